@@ -1,21 +1,32 @@
 import clausify
+import formula as f
 import nnf
 import parser
 import simplify
 
 
-def transform(formula, output):
+def transform(formula, output, fused=False, negate=False):
     """
     :param formula: String representation of a modal formula.
     The syntax for such a formula is per the grammar as stipulated in the README.
     Example input: "(a|b) & (~c => d)"
     :param output: boolean value.
+    :param fused: form the negation normal form and simplify it in a single pass.
+    :param negate: transform the negation of the formula.
 
     :return: if output is true, prints modal clausal form (mcf) of transformed formula.
     Otherwise returns mcf as dictionary.
+    Raises a parser.ParseError, with the position in formula, if formula is not well formed.
     """
     try:
-        modal_clause = clausify.clausify(simplify.simplify(nnf.to_nnf(parser.parse(formula))))  # type: dictionary
+        ast_formula = parser.parse(formula)
+        if negate:
+            ast_formula = f.neg(ast_formula)
+        if fused:
+            nnf_formula = nnf.to_simplified_nnf(ast_formula)
+        else:
+            nnf_formula = simplify.simplify(nnf.to_nnf(ast_formula))
+        modal_clause = clausify.clausify(nnf_formula)  # type: dictionary
 
         if output:
             print(clausify.to_string(modal_clause))
@@ -0,0 +1,115 @@
+"""
+Module of the nodes formulas are represented by.
+Nodes are hash-consed: each distinct formula is created once, by node, so identical sub formulas are shared and two
+formulas are equal exactly when they are the same node. Nodes are never changed once created. The connective of a
+node is an integer opcode; atoms carry their name, and modal nodes the id of their relation.
+"""
+import weakref
+
+TOP = 'True'
+BOTTOM = 'False'
+
+# opcodes of the connectives
+ATOM, NOT, AND, OR, IMP, IFF, BOX, DIA = range(8)
+
+MODAL = (BOX, DIA)
+OPCODES = {'~': NOT, '&': AND, '|': OR, '=>': IMP, '<=>': IFF}
+SYMBOLS = {AND: '&', OR: '|', IMP: '=>', IFF: '<=>'}
+DUAL = {AND: OR, OR: AND, BOX: DIA, DIA: BOX}
+
+
+class Node(object):
+    __slots__ = ('op', 'left', 'right', 'name', 'hash', '__weakref__')
+
+    def __init__(self, op, left, right, name, fml_hash):
+        """
+        Nodes are created with node, never directly, so that each formula has a single node.
+
+        :param op: opcode of the connective
+        :param left: sub formula of unary connectives, left sub formula of binary connectives
+        :param right: right sub formula of binary connectives
+        :param name: name of an atom, or id of the relation of a modality
+        :param fml_hash: hash of the structure of the formula, see node
+        """
+        self.op = op
+        self.left = left
+        self.right = right
+        self.name = name
+        self.hash = fml_hash
+
+    def __hash__(self):
+        return self.hash
+
+    def __str__(self):
+        if self.op == ATOM:
+            return self.name
+        elif self.op == NOT:
+            return '~' + str(self.left)
+        elif self.op == BOX:
+            return '[' + self.name + ']' + str(self.left)
+        elif self.op == DIA:
+            return '<' + self.name + '>' + str(self.left)
+        else:
+            return '(' + str(self.left) + ' ' + SYMBOLS[self.op] + ' ' + str(self.right) + ')'
+
+    __repr__ = __str__
+
+
+# tables of weak references to every node alive. Nodes are found by the hash of their structure; the rare node whose
+# hash is taken by another formula is found by its opcode, name and identity of its sub formulas instead. A node keeps
+# its sub formulas alive, so their identities are not reused while its entry is in the table.
+nodes = {}
+collisions = {}
+
+
+def node(op, left=None, right=None, name=None):
+    """
+    :return the node of the formula, created if there is none yet.
+    """
+    # hash of the structure rather than the identity, so that iteration order does not vary between runs
+    fml_hash = hash((op, name, None if left is None else left.hash, None if right is None else right.hash))
+    ref = nodes.get(fml_hash)
+    fml = ref() if ref is not None else None
+
+    if fml is None:
+        fml = Node(op, left, right, name, fml_hash)
+        ref = nodes[fml_hash] = NodeRef(fml, forget)
+        ref.key = fml_hash
+    elif fml.left is not left or fml.right is not right or fml.op != op or fml.name != name:
+        key = (op, name, id(left), id(right))
+        ref = collisions.get(key)
+        fml = ref() if ref is not None else None
+        if fml is None:
+            fml = Node(op, left, right, name, fml_hash)
+            ref = collisions[key] = NodeRef(fml, forget)
+            ref.key = key
+    return fml
+
+
+class NodeRef(weakref.ref):
+    """ Weak reference to a node, with its key in the table.
+    """
+    __slots__ = ('key',)
+
+
+def forget(ref):
+    """ Removes the entry of a node no longer referenced from its table.
+    """
+    table = collisions if isinstance(ref.key, tuple) else nodes
+    if table.get(ref.key) is ref: del table[ref.key]
+
+
+def atom(name):
+    return node(ATOM, name=name)
+
+
+def neg(fml):
+    return node(NOT, fml)
+
+
+def modal(op, m_id, fml):
+    return node(op, fml, name=m_id)
+
+
+TRUE = atom(TOP)
+FALSE = atom(BOTTOM)
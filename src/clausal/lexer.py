@@ -1,12 +1,21 @@
 """
 Module contains lexing rules for modal logic
+Formulas are split into tokens by a single compiled regular expression, in one pass over the input; whitespace and
+double quotes between tokens are ignored.
 """
-from ply import *
+import re
 
 
-class Atomic(object):
-    def __init__(self, atom):
-        self.atom = atom
+class ParseError(Exception):
+    """ Error in the syntax of a formula, at a position of the input.
+    """
+    def __init__(self, message, position):
+        super(ParseError, self).__init__(message, position)
+        self.message = message
+        self.position = position
+
+    def __str__(self):
+        return 'Syntax error at position {}: {}'.format(self.position, self.message)
 
 
 # Reserved words
@@ -29,38 +38,43 @@ tokens = [
              'IFF',
          ] + list(reserved.values())
 
-# Regular expression rules for simple tokens
-t_LPAREN = r'\('
-t_RPAREN = r'\)'
-t_BOX = r'\[' + '[a-zA-Z_0-9]*?' + '\]'
-t_DIA = r'\<' + '[a-zA-Z_0-9]*?' + '\>'
-t_NOT = r'\~'
-t_AND = r'\&'
-t_OR = r'\|'
-t_IMP = r'\=>'
-t_IFF = r'\<=>'
-
-
-def t_ATOM(t):
-    r'[a-zA-Z_][a-zA-Z_0-9]*'
-    t.type = reserved.get(t.value, 'ATOM')
-    return t
-
-
-# Define a rule so we can track line numbers
-def t_newline(t):
-    r'\n+'
-    t.lexer.lineno += len(t.value)
-
-
-# A string containing ignored characters (spaces and tabs)
-t_ignore = ' \t "'
-
-
-# Error handling rule
-def t_error(t):
-    print("Illegal character '%s'" % t.value[0])
-    t.lexer.skip(1)
-
-
-lex.lex(debug=0)
+# Regular expression of each token, tried in this order; IFF before DIA, although no id holds '='.
+token_rules = [
+    ('ATOM', r'[a-zA-Z_][a-zA-Z_0-9]*'),
+    ('BOX', r'\[[a-zA-Z_0-9]*\]'),
+    ('IFF', r'<=>'),
+    ('DIA', r'<[a-zA-Z_0-9]*>'),
+    ('IMP', r'=>'),
+    ('NOT', r'~'),
+    ('AND', r'&'),
+    ('OR', r'\|'),
+    ('LPAREN', r'\('),
+    ('RPAREN', r'\)'),
+    ('error', r'.'),
+]
+
+# Characters ignored before each token, and at the end of the input where no token follows.
+ignore = r'[\s"]*'
+
+token_re = re.compile(ignore + '(?:' + '|'.join('(?P<{}>{})'.format(name, rule) for name, rule in token_rules) +
+                      '|$)', re.DOTALL)
+
+
+def tokenize(data):
+    """
+    :param data: string of a formula
+    :return generator of tuples (type, value, position) of the tokens of data, ending with the type 'end'.
+    Atoms that are reserved words take the type of the word.
+    """
+    for match in token_re.finditer(data):
+        kind = match.lastgroup
+        if kind is None:
+            break
+        value, position = match.group(kind), match.start(kind)
+        if kind == 'ATOM':
+            kind = reserved.get(value, kind)
+        elif kind == 'error':
+            raise ParseError("illegal character '{}'".format(value), position)
+        yield kind, value, position
+
+    yield 'end', '', len(data)
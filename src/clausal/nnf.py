@@ -1,11 +1,11 @@
 """
 Module to convert a parsed formula into negation normal form.
+Formulas are rewritten with utilities.rewrite, bottom up with an explicit stack, so the depth of a formula is not
+bounded by the recursion limit, and each distinct sub formula is converted once.
 """
 import sys
 
-
-import parser
-import simplify
+import formula as f
 import utilities as u
 
 
@@ -15,96 +15,232 @@ def to_nnf(ast_formula):
     :return: simplified formula represented as an AST.
     """
     try:
-        return nenf(ast_formula)
+        return u.rewrite(ast_formula, nnf_node)
     except Exception as e:
         print('Exception in negation normal forming ast_formula: {}'.format(e.args[0]))
 
 
-def nenf(ast_fml):
-    if ast_fml and not isinstance(ast_fml, parser.Atomic):
-        connective = ast_fml[0]
-        if not isinstance(connective, parser.Atomic):
-            switch = {
-                '~': nnf_not,
-                '=>': nnf_imp,
-                '<=>': nnf_iff,
-                '&': nnf_binary,
-                '|': nnf_binary,
-                'box': nnf_modality,
-                'dia': nnf_modality,
-            }
-            operation = switch.get(repr(connective), nnf_error)
-            return operation(ast_fml, connective)
-        else:
-            return connective
-    else:
-        return ast_fml
-
-
-def nnf_not(sub_fml, connective):
-    left_fml = sub_fml[1]
-
-    if not isinstance(left_fml, parser.Atomic):
-        left_con = left_fml[0]
-        if repr(left_con) == '~':
-            return nenf(left_fml[1])
-        elif repr(left_con) == '&':
-            return [u.op('|'), nenf([u.op('~'), left_fml[1]]), nenf([u.op('~'), left_fml[2]])]
-        elif repr(left_con) == '|':
-            return [u.op('&'), nenf([u.op('~'), left_fml[1]]), nenf([u.op('~'), left_fml[2]])]
-        elif repr(left_con) == '=>':
-            return [u.op('&'), nenf(left_fml[1]), nenf([u.op('~'), left_fml[2]])]
-        elif repr(left_con) == '<=>':
-            return [u.op('|'), [u.op('&'), nenf(left_fml[1]), nenf([u.op('~'), left_fml[2]])],
-                    [u.op('&'), nenf([u.op('~'), left_fml[1]]), nenf(left_fml[2])]]
-        elif repr(left_con) == 'box':
-            # Transfer relation id to modality
-            return [parser.Modality('dia', left_con.id), nenf([u.op('~'), left_fml[1]])]
-        elif repr(left_con) == 'dia':
-            # Transfer relation id to modality
-            return [parser.Modality('box', left_con.id), nenf([u.op('~'), left_fml[1]])]
-        else:
-            return [connective, nenf(left_fml)]
-    else:
-        return sub_fml
+def to_simplified_nnf(ast_formula):
+    """ Single pass equivalent of simplify.simplify(to_nnf(ast_formula)).
+
+    :param ast_formula: parsed expression represented as an abstract syntax tree (AST).
+    :return: simplified formula in negation normal form represented as an AST.
+    """
+    try:
+        return snenf(ast_formula)
+    except Exception as e:
+        print('Exception in negation normal forming ast_formula: {}'.format(e.args[0]))
+
+
+def nnf_node(ast_fml):
+    """
+    :param ast_fml: formula, or a tuple (formula, False) for the negation of the formula; negations are pushed
+    inwards as these tuples, rather than as nodes of the negated sub formulas.
+    :return node of the negation normal form of ast_fml, or the Tail or Build it is formed by.
+    """
+    if ast_fml.__class__ is tuple:
+        sub_fml = ast_fml[0]
+        return negated.get(sub_fml.op, nnf_error)(sub_fml)
+    return switch.get(ast_fml.op, nnf_error)(ast_fml)
+
+
+def nnf_atom_node(sub_fml):
+    return sub_fml
 
 
-def nnf_binary(sub_fml, connective):
-    left_fml = sub_fml[1]
-    right_fml = sub_fml[2]
+def nnf_not(sub_fml):
+    left_fml = sub_fml.left
+
+    if left_fml.op == f.ATOM:
+        return sub_fml
+    else:
+        return u.Tail((left_fml, False))
+
 
-    return [connective, nenf(left_fml), nenf(right_fml)]
+def nnf_binary(sub_fml):
+    return u.Build(sub_fml.op, (sub_fml.left, sub_fml.right))
 
 
-def nnf_imp(sub_fml, con):
+def nnf_imp(sub_fml):
     """ eliminate implications """
-    ant_fml = sub_fml[1]  # antecedent
-    con_fml = sub_fml[2]  # consequent
+    ant_fml = sub_fml.left  # antecedent
+    con_fml = sub_fml.right  # consequent
 
-    return [u.op('|'), nenf([u.op('~'), ant_fml]), nenf(con_fml)]
+    return u.Build(f.OR, ((ant_fml, False), con_fml))
 
 
-def nnf_iff(sub_fml, connective):
+def nnf_iff(sub_fml):
     """ eliminate if and only ifs """
-    left_fml = sub_fml[1]
-    right_fml = sub_fml[2]
+    left_fml = sub_fml.left
+    right_fml = sub_fml.right
 
-    return [u.op('|'), [u.op('&'), nenf(left_fml), nenf(right_fml)],
-            [u.op('&'), nenf([u.op('~'), left_fml]), nenf([u.op('~'), right_fml])]]
+    return u.Build(f.OR, (u.Build(f.AND, (left_fml, right_fml)),
+                          u.Build(f.AND, ((left_fml, False), (right_fml, False)))))
 
 
-def nnf_modality(sub_fml, connective):
-    left_fml = sub_fml[1]
+def nnf_modality(sub_fml):
+    left_fml = sub_fml.left
 
-    if not isinstance(left_fml, parser.Atomic):
-        return [connective, nenf(left_fml)]
+    if left_fml.op != f.ATOM:
+        return u.Build(sub_fml.op, (left_fml,), sub_fml.name)
     else:
         return sub_fml
 
 
-def nnf_error(sub_fml, connective):
-    sys.stderr.write('Error in negation normal forming: ' + str(connective) + '\n')
+def nnf_not_atom(sub_fml):
+    return f.neg(sub_fml)
+
+
+def nnf_not_not(sub_fml):
+    return u.Tail(sub_fml.left)
+
+
+def nnf_not_binary(sub_fml):
+    return u.Build(f.DUAL[sub_fml.op], ((sub_fml.left, False), (sub_fml.right, False)))
+
+
+def nnf_not_imp(sub_fml):
+    return u.Build(f.AND, (sub_fml.left, (sub_fml.right, False)))
+
+
+def nnf_not_iff(sub_fml):
+    left_fml = sub_fml.left
+    right_fml = sub_fml.right
+
+    return u.Build(f.OR, (u.Build(f.AND, (left_fml, (right_fml, False))),
+                          u.Build(f.AND, ((left_fml, False), right_fml))))
+
+
+def nnf_not_modality(sub_fml):
+    # Transfer relation id to modality
+    return u.Build(f.DUAL[sub_fml.op], ((sub_fml.left, False),), sub_fml.name)
+
+
+def nnf_error(sub_fml):
+    sys.stderr.write('Error in negation normal forming: ' + str(sub_fml) + '\n')
     raise SystemExit(1)
 
 
+switch = {
+    f.ATOM: nnf_atom_node,
+    f.NOT: nnf_not,
+    f.IMP: nnf_imp,
+    f.IFF: nnf_iff,
+    f.AND: nnf_binary,
+    f.OR: nnf_binary,
+    f.BOX: nnf_modality,
+    f.DIA: nnf_modality,
+}
+
+# rules for the negation of a formula, by the connective of the formula
+negated = {
+    f.ATOM: nnf_not_atom,
+    f.NOT: nnf_not_not,
+    f.IMP: nnf_not_imp,
+    f.IFF: nnf_not_iff,
+    f.AND: nnf_not_binary,
+    f.OR: nnf_not_binary,
+    f.BOX: nnf_not_modality,
+    f.DIA: nnf_not_modality,
+}
+
+
+def snenf(ast_fml):
+    """ Simplifies the negation normal form of ast_fml as it is formed.
+    The formulas rewritten are virtual nodes of the negation normal form, see nnf_shape, rather than nodes; the rules
+    of simplify are applied to each virtual node and its immediate children, as simplify does to the formed node.
+    """
+    return u.rewrite((ast_fml, True), lambda virtual: simplify_shape(nnf_shape(virtual)))
+
 
+def normalise(fml, positive):
+    """
+    :param fml: sub formula, to be taken negated if not positive
+    :return: equivalent tuple (fml, positive), without double negations.
+    """
+    while fml.op == f.NOT and not (positive and fml.left.op == f.ATOM):
+        fml, positive = fml.left, not positive
+    return fml, positive
+
+
+def nnf_shape(virtual):
+    """
+    :param virtual: tuple (fml, positive), or a tuple (AND, left, right) of virtual nodes
+    :return: tuple of the kind of the node of the negation normal form, and what the kind needs:
+        ('atom', atom), ('literal', node or None, atom), ('binary', opcode, left, right) for & and |, or
+        ('modal', opcode, relation id, virtual sub formula, node or None). A node is the formula itself, where the
+        negation normal form of the formula is itself.
+    """
+    if len(virtual) == 3:
+        return 'binary', f.AND, virtual[1], virtual[2]
+
+    fml, positive = normalise(*virtual)
+    con = fml.op
+    if con == f.ATOM:
+        return ('atom', fml) if positive else ('literal', None, fml)
+    elif con == f.NOT:
+        return 'literal', fml, fml.left
+    elif con == f.AND or con == f.OR:
+        if positive: return 'binary', con, (fml.left, True), (fml.right, True)
+        return 'binary', f.DUAL[con], (fml.left, False), (fml.right, False)
+    elif con == f.IMP:
+        if positive: return 'binary', f.OR, (fml.left, False), (fml.right, True)
+        return 'binary', f.AND, (fml.left, True), (fml.right, False)
+    elif con == f.IFF:
+        return 'binary', f.OR, (f.AND, (fml.left, True), (fml.right, positive)), \
+               (f.AND, (fml.left, False), (fml.right, not positive))
+    elif con == f.BOX or con == f.DIA:
+        if positive:
+            return 'modal', con, fml.name, (fml.left, True), fml if fml.left.op == f.ATOM else None
+        return 'modal', f.DUAL[con], fml.name, (fml.left, False), None
+    else:
+        nnf_error(fml)
+
+
+def nnf_atom(virtual):
+    """
+    :return: atom the virtual node forms, or None if it does not form an atom.
+    """
+    if len(virtual) == 3: return None
+    shape = nnf_shape(virtual)
+    return shape[1] if shape[0] == 'atom' else None
+
+
+def simplify_shape(shape):
+    """
+    :return: simplified node of the virtual node of given shape, per the rules of simplify, or the Tail or Build it
+    is formed by.
+    """
+    kind = shape[0]
+
+    if kind == 'atom':
+        return shape[1]
+    elif kind == 'literal':
+        atom = shape[2]
+        if atom is f.FALSE:
+            return f.TRUE
+        elif atom is f.TRUE:
+            return f.FALSE
+        return shape[1] if shape[1] is not None else f.neg(atom)
+    elif kind == 'binary':
+        connective, left, right = shape[1:]
+        left_atom, right_atom = nnf_atom(left), nnf_atom(right)
+        if connective == f.AND:
+            absorbing, identity = f.FALSE, f.TRUE
+        else:
+            absorbing, identity = f.TRUE, f.FALSE
+
+        if left_atom is absorbing or right_atom is absorbing:
+            return absorbing
+        elif left_atom is identity:
+            return u.Tail(right)
+        elif right_atom is identity:
+            return u.Tail(left)
+        else:
+            return u.Build(connective, (left, right))
+    else:
+        connective, m_id, sub_virtual, node = shape[1:]
+        sub_atom = nnf_atom(sub_virtual)
+        if sub_atom is not None:
+            return node if node is not None else f.modal(connective, m_id, sub_atom)
+        return u.Build(connective, (sub_virtual,), m_id)
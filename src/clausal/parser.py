@@ -1,67 +1,12 @@
-import sys
-from ply import *
+"""
+Module to parse a formula, per the grammar of the README, into formula nodes.
+The parser climbs the precedence of the connectives over the tokens of lexer.tokenize, in a single pass, with explicit
+stacks of operands and pending connectives, so the nesting of a formula is not bounded by the recursion limit.
+Syntax errors are raised as a ParseError, with the position of the offending token.
+"""
+import formula as f
 
-TOP = 'True'
-BOTTOM = 'False'
-
-
-# Define classes for required operators - atomic, modalities and operators
-class Atomic(object):
-    def __init__(self, atom):
-        self.atom = atom
-
-    def __str__(self):
-        return str(self.atom)
-
-    def __eq__(self, other):
-        if str(self.atom) == str(other):
-            return True
-        else:
-            return False
-
-    def __hash__(self):
-        return hash(str(self.atom))
-
-    __repr__ = __str__
-
-
-class Modality(object):
-    def __init__(self, mode, m_id):
-        self.mode = mode
-        self.id = m_id
-
-    def __repr__(self):
-        return str(self.mode)
-
-    def __str__(self):
-        if self.mode == "box":
-            return "[" + self.id + "]"
-        elif self.mode == "dia":
-            return "<" + self.id + ">"
-
-    def __eq__(self, other):
-        if isinstance(self, Modality) and isinstance(other, Modality):
-            if str(self.mode) == str(other.mode) and self.id == other.id:
-                return True
-        else:
-            return False
-
-    def __hash__(self):
-        return hash(self.mode) + hash(self.id)
-
-
-class Operator(object):
-    def __init__(self, mode):
-        self.mode = mode
-
-    def __str__(self):
-        return str(self.mode)
-
-    __repr__ = __str__
-
-
-# Get the token mapping from lexer.
-from lexer import tokens
+from lexer import ParseError, tokenize
 
 # Define a BNF grammar for modal logic.
 '''
@@ -73,96 +18,97 @@ formula0 : 'false'
        | '[id]' formula1
        | '<id>' formula1
        | formula1 '=>' formula1      # right associative
+       | formula1 '<=>' formula1     # right associative
      | formula1 '|' formula1       # left associative
      | formula1 '&' formula1       # left associative
 term0    : ATOM
 '''
 
-# Define token preference, from lowest to highest.
-precedence = (
-    ('right', 'IMP', 'IFF'),
-    ('left', 'OR'),
-    ('left', 'AND'),
-    ('right', 'BOX', 'DIA', 'NOT'),
-)
+# Binding power of the connectives, from lowest to highest, and whether they are right associative.
+BINARY = {
+    'IMP': (1, True),
+    'IFF': (1, True),
+    'OR': (2, False),
+    'AND': (3, False),
+}
+PREFIX = 4  # binding power of ~, [id] and <id>
 
+LPAREN = 0  # binding power of a pending parenthesis, below every connective
 
-def p_formula_braced(p):
-    """
-      formula : LPAREN formula RPAREN
-      """
-    p[0] = p[2]
+OPCODES = {'IMP': f.IMP, 'IFF': f.IFF, 'OR': f.OR, 'AND': f.AND, 'NOT': f.NOT, 'BOX': f.BOX, 'DIA': f.DIA}
 
 
-def p_formula_modal(p):
+def parse(data):
     """
-      formula : BOX formula
-        | DIA formula
-      """
-    if p[1][:1] == '[':
-        syn = 'box'
-    elif p[1][:1] == '<':
-        syn = 'dia'
-    else:
-        pass
-
-    m_id = p[1][1:-1]
-
-    p[0] = [Modality(syn, m_id), p[2]]
-
-
-def p_formula_not(p):
+    :param data: string of a formula.
+    :return: node of the formula.
+    :raises ParseError: if data is not a formula, at the position of the first token that cannot follow.
     """
-      formula : NOT formula
-      """
-    p[0] = [Operator(p[1]), p[2]]
-
+    operands = []
+    pending = []  # tuples (binding power, token type, token value, position) of connectives and parentheses
+    operand = True  # whether an operand is expected next, rather than a connective
+
+    for kind, value, position in tokenize(data):
+        if operand:
+            if kind == 'ATOM' or kind == 'true' or kind == 'false':
+                operands.append(atomic(value))
+                operand = False
+            elif kind == 'NOT' or kind == 'BOX' or kind == 'DIA':
+                pending.append((PREFIX, kind, value, position))
+            elif kind == 'LPAREN':
+                pending.append((LPAREN, kind, value, position))
+            else:
+                raise ParseError(expected('a formula', value), position)
+
+        elif kind in BINARY:
+            power, right = BINARY[kind]
+            # reduce the pending connectives that bind tighter, and those as tight unless right associative
+            while pending and (pending[-1][0] > power or pending[-1][0] == power and not right):
+                reduce(operands, pending.pop())
+            pending.append((power, kind, value, position))
+            operand = True
+
+        elif kind == 'RPAREN' or kind == 'end':
+            while pending and pending[-1][0] != LPAREN:
+                reduce(operands, pending.pop())
+            if kind == 'end':
+                if pending:
+                    raise ParseError("expected ')' to close the '(' at position {}".format(pending[-1][3]), position)
+                return operands.pop()
+            elif not pending:
+                raise ParseError("unmatched ')'", position)
+            pending.pop()
 
-def p_formula_binary(p):
-    """
-      formula : formula IMP formula
-        | formula IFF formula
-        | formula AND formula
-        | formula OR formula
-      """
-    p[0] = [Operator(p[2]), p[1], p[3]]
+        else:
+            raise ParseError(expected('a connective', value), position)
 
 
-def p_formula_atomic(p):
-    """
-      formula : false
-        | true
-        | term
-      """
-    global TOP, BOTTOM
-
-    if str(p[1]).lower() == 'true':
-        p[0] = Atomic(TOP)
-    elif str(p[1]).lower() == 'false':
-        p[0] = Atomic(BOTTOM)
+def atomic(value):
+    if value.lower() == 'true':
+        return f.TRUE
+    elif value.lower() == 'false':
+        return f.FALSE
     else:
-        p[0] = p[1]
+        return f.atom(value)
 
 
-def p_term_atom(p):
+def reduce(operands, connective):
+    """ Replaces the operands of the connective, on top of operands, with the formula it forms.
     """
-    term : ATOM
-    """
-    p[0] = Atomic(p[1])
-
+    power, kind, value, position = connective
+    op = OPCODES[kind]
 
-# Error rule for syntax errors
-def p_error(p):
-    sys.stderr.write('Syntax error in input. \n')
-    raise SystemExit(1)
-
-
-bparser = yacc.yacc()
+    if power == PREFIX:
+        sub_fml = operands.pop()
+        if op == f.NOT:
+            operands.append(f.neg(sub_fml))
+        else:
+            # Transfer relation id to modality
+            operands.append(f.modal(op, value[1:-1], sub_fml))
+    else:
+        right_fml = operands.pop()
+        operands.append(f.node(op, operands.pop(), right_fml))
 
 
-def parse(data, debug=0):
-    bparser.error = 0
-    p = bparser.parse(data, debug=debug)
-    if bparser.error:
-        return None
-    return p
+def expected(what, value):
+    return 'expected {}, found {}'.format(what, "'" + value + "'" if value else 'end of input')
@@ -0,0 +1,135 @@
+"""
+Module of the ply grammar formulas were parsed with before parser, kept as the reference parser.py is checked and
+timed against, see prover/testing/testing_parser.py. It accepts the same formulas and forms the same nodes.
+The LALR tables are shipped as ply_parsetab.py, written by running this module after the grammar changes.
+"""
+import os
+
+from ply import lex, yacc
+
+import formula as f
+
+from lexer import ParseError, reserved, tokens
+
+# Regular expression rules for simple tokens
+t_LPAREN = r'\('
+t_RPAREN = r'\)'
+t_BOX = r'\[' + '[a-zA-Z_0-9]*?' + '\]'
+t_DIA = r'\<' + '[a-zA-Z_0-9]*?' + '\>'
+t_NOT = r'\~'
+t_AND = r'\&'
+t_OR = r'\|'
+t_IMP = r'\=>'
+t_IFF = r'\<=>'
+
+
+def t_ATOM(t):
+    r'[a-zA-Z_][a-zA-Z_0-9]*'
+    t.type = reserved.get(t.value, 'ATOM')
+    return t
+
+
+# Define a rule so we can track line numbers
+def t_newline(t):
+    r'\n+'
+    t.lexer.lineno += len(t.value)
+
+
+# A string containing ignored characters (spaces and tabs)
+t_ignore = ' \t\r\f\v "'
+
+
+# Error handling rule
+def t_error(t):
+    raise ParseError("illegal character '{}'".format(t.value[0]), t.lexpos)
+
+
+# Define token preference, from lowest to highest.
+precedence = (
+    ('right', 'IMP', 'IFF'),
+    ('left', 'OR'),
+    ('left', 'AND'),
+    ('right', 'BOX', 'DIA', 'NOT'),
+)
+
+
+def p_formula_braced(p):
+    """
+      formula : LPAREN formula RPAREN
+      """
+    p[0] = p[2]
+
+
+def p_formula_modal(p):
+    """
+      formula : BOX formula
+        | DIA formula
+      """
+    syn = f.BOX if p[1][:1] == '[' else f.DIA
+    m_id = p[1][1:-1]
+
+    p[0] = f.modal(syn, m_id, p[2])
+
+
+def p_formula_not(p):
+    """
+      formula : NOT formula
+      """
+    p[0] = f.neg(p[2])
+
+
+def p_formula_binary(p):
+    """
+      formula : formula IMP formula
+        | formula IFF formula
+        | formula AND formula
+        | formula OR formula
+      """
+    p[0] = f.node(f.OPCODES[p[2]], p[1], p[3])
+
+
+def p_formula_atomic(p):
+    """
+      formula : false
+        | true
+        | term
+      """
+    if str(p[1]).lower() == 'true':
+        p[0] = f.TRUE
+    elif str(p[1]).lower() == 'false':
+        p[0] = f.FALSE
+    else:
+        p[0] = p[1]
+
+
+def p_term_atom(p):
+    """
+    term : ATOM
+    """
+    p[0] = f.atom(p[1])
+
+
+# Error rule for syntax errors
+def p_error(p):
+    if p is None:
+        raise ParseError('unexpected end of input', len(blexer.lexdata))
+    raise ParseError("unexpected '{}'".format(p.value), p.lexpos)
+
+
+TABLES = 'ply_parsetab'
+
+blexer = lex.lex(debug=0)
+# tables are read from the shipped module, never written on import; they are built in memory if out of date
+bparser = yacc.yacc(debug=False, write_tables=False, tabmodule=TABLES)
+
+
+def parse(data):
+    """
+    :param data: string of a formula.
+    :return: node of the formula.
+    """
+    return bparser.parse(data, lexer=blexer)
+
+
+if __name__ == "__main__":
+    yacc.yacc(debug=False, tabmodule=TABLES, outputdir=os.path.dirname(os.path.abspath(__file__)))
@@ -0,0 +1,42 @@
+
+# ply_parsetab.py
+# This file is automatically generated. Do not edit.
+# pylint: disable=W,C,R
+_tabversion = '3.10'
+
+_lr_method = 'LALR'
+
+_lr_signature = 'rightIMPIFFleftORleftANDrightBOXDIANOTAND ATOM BOX DIA IFF IMP LPAREN NOT OR RPAREN false true\n      formula : LPAREN formula RPAREN\n      \n      formula : BOX formula\n        | DIA formula\n      \n      formula : NOT formula\n      \n      formula : formula IMP formula\n        | formula IFF formula\n        | formula AND formula\n        | formula OR formula\n      \n      formula : false\n        | true\n        | term\n      \n    term : ATOM\n    '
+    
+_lr_action_items = {'LPAREN':([0,2,3,4,5,10,11,12,13,],[2,2,2,2,2,2,2,2,2,]),'BOX':([0,2,3,4,5,10,11,12,13,],[3,3,3,3,3,3,3,3,3,]),'DIA':([0,2,3,4,5,10,11,12,13,],[4,4,4,4,4,4,4,4,4,]),'NOT':([0,2,3,4,5,10,11,12,13,],[5,5,5,5,5,5,5,5,5,]),'false':([0,2,3,4,5,10,11,12,13,],[6,6,6,6,6,6,6,6,6,]),'true':([0,2,3,4,5,10,11,12,13,],[7,7,7,7,7,7,7,7,7,]),'ATOM':([0,2,3,4,5,10,11,12,13,],[9,9,9,9,9,9,9,9,9,]),'$end':([1,6,7,8,9,15,16,17,18,19,20,21,22,],[0,-9,-10,-11,-12,-2,-3,-4,-5,-6,-7,-8,-1,]),'IMP':([1,6,7,8,9,14,15,16,17,18,19,20,21,22,],[10,-9,-10,-11,-12,10,-2,-3,-4,10,10,-7,-8,-1,]),'IFF':([1,6,7,8,9,14,15,16,17,18,19,20,21,22,],[11,-9,-10,-11,-12,11,-2,-3,-4,11,11,-7,-8,-1,]),'AND':([1,6,7,8,9,14,15,16,17,18,19,20,21,22,],[12,-9,-10,-11,-12,12,-2,-3,-4,12,12,-7,12,-1,]),'OR':([1,6,7,8,9,14,15,16,17,18,19,20,21,22,],[13,-9,-10,-11,-12,13,-2,-3,-4,13,13,-7,-8,-1,]),'RPAREN':([6,7,8,9,14,15,16,17,18,19,20,21,22,],[-9,-10,-11,-12,22,-2,-3,-4,-5,-6,-7,-8,-1,]),}
+
+_lr_action = {}
+for _k, _v in _lr_action_items.items():
+   for _x,_y in zip(_v[0],_v[1]):
+      if not _x in _lr_action:  _lr_action[_x] = {}
+      _lr_action[_x][_k] = _y
+del _lr_action_items
+
+_lr_goto_items = {'formula':([0,2,3,4,5,10,11,12,13,],[1,14,15,16,17,18,19,20,21,]),'term':([0,2,3,4,5,10,11,12,13,],[8,8,8,8,8,8,8,8,8,]),}
+
+_lr_goto = {}
+for _k, _v in _lr_goto_items.items():
+   for _x, _y in zip(_v[0], _v[1]):
+       if not _x in _lr_goto: _lr_goto[_x] = {}
+       _lr_goto[_x][_k] = _y
+del _lr_goto_items
+_lr_productions = [
+  ("S' -> formula","S'",1,None,None,None),
+  ('formula -> LPAREN formula RPAREN','formula',3,'p_formula_braced','ply_parser.py',58),
+  ('formula -> BOX formula','formula',2,'p_formula_modal','ply_parser.py',65),
+  ('formula -> DIA formula','formula',2,'p_formula_modal','ply_parser.py',66),
+  ('formula -> NOT formula','formula',2,'p_formula_not','ply_parser.py',76),
+  ('formula -> formula IMP formula','formula',3,'p_formula_binary','ply_parser.py',83),
+  ('formula -> formula IFF formula','formula',3,'p_formula_binary','ply_parser.py',84),
+  ('formula -> formula AND formula','formula',3,'p_formula_binary','ply_parser.py',85),
+  ('formula -> formula OR formula','formula',3,'p_formula_binary','ply_parser.py',86),
+  ('formula -> false','formula',1,'p_formula_atomic','ply_parser.py',93),
+  ('formula -> true','formula',1,'p_formula_atomic','ply_parser.py',94),
+  ('formula -> term','formula',1,'p_formula_atomic','ply_parser.py',95),
+  ('term -> ATOM','term',1,'p_term_atom','ply_parser.py',107),
+]
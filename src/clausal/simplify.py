@@ -1,10 +1,12 @@
 """
 Module to simplify modal formula where possible.
 Specifically, the module eliminates propositional constants and double negations from the input formula.
+Formulas are rewritten with utilities.rewrite, as in nnf, so the depth of a formula is not bounded by the recursion
+limit. Each rule looks at the immediate sub formulas of a node as given, before they are simplified.
 """
 import sys
 
-import parser as p
+import formula as f
 import utilities as u
 
 
@@ -20,112 +22,115 @@ def simplify(ast_formula):
 
 
 def psimplfy(ast_fml):
-    if ast_fml and not isinstance(ast_fml, p.Atomic):
-        connective = ast_fml[0]
-        if not isinstance(connective, p.Atomic):
-            switch = {
-                '~': eval_not,
-                '&': eval_and,
-                '|': eval_or,
-                '=>': eval_imp,
-                '<=>': eval_iff,
-                'box': eval_modality,
-                'dia': eval_modality,
-            }
-            operation = switch.get(repr(connective), eval_error)
-            return operation(ast_fml, connective)
-        else:
-            return connective
-    else:
-        return ast_fml
+    return u.rewrite(ast_fml, simplify_node)
+
 
+def simplify_node(ast_fml):
+    """
+    :return simplified node of ast_fml, or the Tail or Build it is formed by.
+    """
+    return switch.get(ast_fml.op, eval_error)(ast_fml)
 
-def eval_not(sub_fml, connective):
-    left_fml = sub_fml[1]
 
-    if left_fml == p.BOTTOM:
-        return p.Atomic(p.TOP)
-    elif left_fml == p.TOP:
-        return p.Atomic(p.BOTTOM)
-    elif not isinstance(left_fml, p.Atomic):
-        if repr(left_fml[0]) == '~':
-            return psimplfy(left_fml[1])
+def eval_atom(sub_fml):
+    return sub_fml
+
+
+def eval_not(sub_fml):
+    left_fml = sub_fml.left
+
+    if left_fml is f.FALSE:
+        return f.TRUE
+    elif left_fml is f.TRUE:
+        return f.FALSE
+    elif left_fml.op != f.ATOM:
+        if left_fml.op == f.NOT:
+            return u.Tail(left_fml.left)
         else:
-            return [connective, psimplfy(left_fml)]
+            return u.Build(f.NOT, (left_fml,))
     else:
         return sub_fml
 
 
-def eval_and(sub_fml, connective):
-    left_fml = sub_fml[1]
-    right_fml = sub_fml[2]
+def eval_and(sub_fml):
+    left_fml = sub_fml.left
+    right_fml = sub_fml.right
 
-    if left_fml == p.BOTTOM or right_fml == p.BOTTOM:
-        return p.Atomic(p.BOTTOM)
-    elif left_fml == p.TOP:
-        return psimplfy(right_fml)
-    elif right_fml == p.TOP:
-        return psimplfy(left_fml)
+    if left_fml is f.FALSE or right_fml is f.FALSE:
+        return f.FALSE
+    elif left_fml is f.TRUE:
+        return u.Tail(right_fml)
+    elif right_fml is f.TRUE:
+        return u.Tail(left_fml)
     else:
-        return [connective, psimplfy(left_fml), psimplfy(right_fml)]
+        return u.Build(f.AND, (left_fml, right_fml))
 
 
-def eval_or(sub_fml, connective):
-    left_fml = sub_fml[1]
-    right_fml = sub_fml[2]
+def eval_or(sub_fml):
+    left_fml = sub_fml.left
+    right_fml = sub_fml.right
 
-    if left_fml == p.TOP or right_fml == p.TOP:
-        return p.Atomic(p.TOP)
-    elif left_fml == p.BOTTOM:
-        return psimplfy(right_fml)
-    elif right_fml == p.BOTTOM:
-        return psimplfy(left_fml)
+    if left_fml is f.TRUE or right_fml is f.TRUE:
+        return f.TRUE
+    elif left_fml is f.FALSE:
+        return u.Tail(right_fml)
+    elif right_fml is f.FALSE:
+        return u.Tail(left_fml)
     else:
-        return [connective, psimplfy(left_fml), psimplfy(right_fml)]
+        return u.Build(f.OR, (left_fml, right_fml))
 
 
-def eval_imp(sub_fml, connective):
-    ant_fml = sub_fml[1]  # antecedent
-    con_fml = sub_fml[2]  # consequent
+def eval_imp(sub_fml):
+    ant_fml = sub_fml.left  # antecedent
+    con_fml = sub_fml.right  # consequent
 
-    if ant_fml == p.BOTTOM or con_fml == p.TOP:
-        return p.Atomic(p.TOP)
-    elif ant_fml == p.TOP:
-        return psimplfy(con_fml)
-    elif con_fml == p.BOTTOM:
-        return psimplfy([u.op('~'), ant_fml])
+    if ant_fml is f.FALSE or con_fml is f.TRUE:
+        return f.TRUE
+    elif ant_fml is f.TRUE:
+        return u.Tail(con_fml)
+    elif con_fml is f.FALSE:
+        return u.Tail(f.neg(ant_fml))
     else:
-        return [connective, psimplfy(ant_fml), psimplfy(con_fml)]
+        return u.Build(f.IMP, (ant_fml, con_fml))
 
 
-def eval_iff(sub_fml, connective):
-    left_fml = sub_fml[1]
-    right_fml = sub_fml[2]
+def eval_iff(sub_fml):
+    left_fml = sub_fml.left
+    right_fml = sub_fml.right
 
-    if left_fml == p.TOP:
-        return psimplfy(right_fml)
-    elif right_fml == p.TOP:
-        return psimplfy(left_fml)
-    elif left_fml == p.BOTTOM:
-        return psimplfy([u.op('~'), right_fml])
-    elif right_fml == p.BOTTOM:
-        return psimplfy([u.op('~'), left_fml])
+    if left_fml is f.TRUE:
+        return u.Tail(right_fml)
+    elif right_fml is f.TRUE:
+        return u.Tail(left_fml)
+    elif left_fml is f.FALSE:
+        return u.Tail(f.neg(right_fml))
+    elif right_fml is f.FALSE:
+        return u.Tail(f.neg(left_fml))
     else:
-        return [connective, psimplfy(left_fml), psimplfy(right_fml)]
+        return u.Build(f.IFF, (left_fml, right_fml))
 
 
-def eval_modality(sub_fml, connective):
-    left_fml = sub_fml[1]
+def eval_modality(sub_fml):
+    left_fml = sub_fml.left
 
-    if not isinstance(left_fml, p.Atomic):
-        return [connective, psimplfy(left_fml)]
+    if left_fml.op != f.ATOM:
+        return u.Build(sub_fml.op, (left_fml,), sub_fml.name)
     else:
         return sub_fml
 
 
-def eval_error(sub_fml, connective):
+def eval_error(sub_fml):
     sys.stderr.write('Error in simplification: ' + str(sub_fml) + '\n')
     raise SystemExit(1)
 
 
-
+switch = {
+    f.ATOM: eval_atom,
+    f.NOT: eval_not,
+    f.AND: eval_and,
+    f.OR: eval_or,
+    f.IMP: eval_imp,
+    f.IFF: eval_iff,
+    f.BOX: eval_modality,
+    f.DIA: eval_modality,
+}
@@ -1,4 +1,4 @@
-import parser
+import formula as f
 
 
 def my_isinstance(in_object, in_class):
@@ -11,31 +11,108 @@ def my_isinstance(in_object, in_class):
     return in_object.__class__.__name__ == in_class.__name__
 
 
-def op(operator):
-    """
-    :param operator: a string representing a logical connective
-
-    :return: an operator object
-    """
-    return parser.Operator(operator)
-
-
 def is_atomic(fml):
     """
-    :param fml: a string representing a logical expression
+    :param fml: a formula node
 
     :return: true if input expression is an atom.
     """
-    return my_isinstance(fml, parser.Atomic)
+    return fml.op == f.ATOM
 
 
 def is_complex(fml):
     """
-    :param fml: a string representing a logical expression
+    :param fml: a formula node
 
     :return: true if fml is a complex.
     """
-    if is_atomic(fml):
+    if fml.op == f.ATOM:
         return False
     else:
-        return not (repr(fml[0]) == '~' and is_atomic(fml[1]))
+        return not (fml.op == f.NOT and fml.left.op == f.ATOM)
+
+
+# actions of the stack of a rewrite
+VISIT, BUILD, MEMO = range(3)
+
+
+class Tail(object):
+    """ Result of a rule of a rewrite that is the result of another formula.
+    """
+    __slots__ = ('fml',)
+
+    def __init__(self, fml):
+        self.fml = fml
+
+
+class Build(object):
+    """ Result of a rule of a rewrite that is a node over the results of other formulas.
+    """
+    __slots__ = ('op', 'subs', 'name')
+
+    def __init__(self, op, subs, name=None):
+        """
+        :param op: opcode of the node
+        :param subs: formulas the node is formed over, each rewritten first; or nested Builds
+        :param name: relation id of a modal node
+        """
+        self.op = op
+        self.subs = subs
+        self.name = name
+
+
+def rewrite(fml, rule):
+    """ Rewrites a formula bottom up with an explicit stack, so the depth of a formula is not bounded by the recursion
+    limit. Each distinct formula is rewritten once, as shared sub formulas are the same node.
+
+    :param fml: formula to rewrite, any hashable value rule accepts
+    :param rule: function of a formula returning its rewritten node, a Tail or a Build
+
+    :return: rewritten node of fml.
+    """
+    memo, values = {}, []
+    stack = [(VISIT, fml)]
+
+    while stack:
+        action, item = stack.pop()
+        if action == VISIT:
+            result = memo.get(item)
+            if result is not None:
+                values.append(result)
+                continue
+
+            aliases = [item]
+            result = rule(item)
+            while isinstance(result, Tail):
+                if result.fml in memo:
+                    result = memo[result.fml]
+                    break
+                aliases.append(result.fml)
+                result = rule(result.fml)
+
+            if isinstance(result, Build):
+                stack.append((MEMO, aliases))
+                expand(stack, result)
+            else:
+                for alias in aliases: memo[alias] = result
+                values.append(result)
+        elif action == BUILD:
+            arity = len(item.subs)
+            result = f.node(item.op, *values[-arity:], name=item.name)
+            del values[-arity:]
+            values.append(result)
+        else:
+            for alias in item: memo[alias] = values[-1]
+
+    return values[0]
+
+
+def expand(stack, build):
+    """ Pushes a Build, and after it the formulas it is formed over, so that their results precede it.
+    """
+    stack.append((BUILD, build))
+    for sub in reversed(build.subs):
+        if isinstance(sub, Build):
+            expand(stack, sub)
+        else:
+            stack.append((VISIT, sub))
@@ -1,35 +1,98 @@
+import os
+import io
+import sys
+import glob
+import json
 import time
 import argparse
-
+from contextlib import redirect_stdout, redirect_stderr
 
 from clausal.clausifer import transform
+from parser import ParseError
 from prover.k_prove import *
-from z3 import sat
+from prover.backend import BACKENDS, sat
 
+VALID = "Psi is valid"
+NON_VALID = "Psi is NOT valid"
 
-def prove(formula, verbose):
+def prove(formula, verbose, backend='z3', minimise=MINIMISE_CORES, fused=False):
     """
     :param formula: String representation of a modal formula.
     The syntax for such a formula is per the grammar as stipulated in the README.
     Example input: "(a|b) & (~c => d)"
+    :param backend: name of the SAT solver backend used by k_prove.
+    :param minimise: minimise the unsat cores of closed branches in k_prove.
+    :param fused: form the negation normal form and simplify it in a single pass.
 
     :return string showing the outcome of the proof, that is valid or not valid.
+    Raises a ParseError, with the position in formula, if formula is not well formed.
     """
     try:
         sys.setrecursionlimit(15000)
-        negated_fml = "~(" + str(formula) + ")"
-
-        negated_clausal_fml = call_function(verbose, transform, negated_fml, False)
+        negated_clausal_fml = call_function(verbose, transform, str(formula), False, fused, True)
 
-        if call_function(verbose, k_prove, negated_clausal_fml) == sat:
-            return "Psi is NOT valid"
+        if call_function(verbose, k_prove, negated_clausal_fml, backend, minimise) == sat:
+            return NON_VALID
         else:
-            return "Psi is valid"
+            return VALID
 
     finally:
         sys.setrecursionlimit(1000)
 
 
+def prove_many(formulas, backend='z3', minimise=MINIMISE_CORES, fused=False):
+    """
+    Proves a stream of formulas in this process, so the parser and z3 are loaded once for all of them.
+
+    :param formulas: iterable of tuples (name, formula), see read_formulas.
+    :param backend: name of the SAT solver backend used by k_prove.
+    :param minimise: minimise the unsat cores of closed branches in k_prove.
+    :param fused: form the negation normal form and simplify it in a single pass.
+
+    :return generator of dictionaries, one per formula, with the name, result and time taken in seconds.
+    The result is valid, not valid or error; a formula that cannot be proved does not stop the batch, and the
+    message printed for it is kept as the error.
+    """
+    for name, formula in formulas:
+        output = io.StringIO()
+        start = time.time()
+        try:
+            with redirect_stdout(output), redirect_stderr(output):
+                outcome = prove(formula, False, backend, minimise, fused)
+            result = {'name': name, 'result': "valid" if outcome == VALID else "not valid"}
+        except ParseError as e:
+            result = {'name': name, 'result': "error", 'error': str(e)}
+        except (Exception, SystemExit) as e:
+            message = output.getvalue().strip() or repr(e)
+            result = {'name': name, 'result': "error", 'error': message}
+        result['time'] = round(time.time() - start, 6)
+
+        yield result
+
+
+def read_formulas(path):
+    """
+    :param path: file of formulas, one per line, directory searched for .k files, or - for standard input.
+
+    :return generator of tuples (name, formula), named by file and line number. Blank lines are skipped.
+    """
+    if path == '-':
+        files = [('<stdin>', sys.stdin)]
+    elif os.path.isdir(path):
+        files = ((name, None) for name in sorted(glob.glob(os.path.join(path, '**', '*.k'), recursive=True)))
+    else:
+        files = [(path, None)]
+
+    for name, stream in files:
+        fileobj = stream or open(name, "r")
+        try:
+            for line_no, line in enumerate(fileobj, 1):
+                formula = line.strip()
+                if formula: yield name + ":" + str(line_no), formula
+        finally:
+            if stream is None: fileobj.close()
+
+
 def call_function(verbose, function, *args):
     if verbose: return timed(function, *args)
     else: return function(*args)
@@ -45,14 +108,28 @@ def timed(function, *args):
 
 
 if __name__ == '__main__':
-    if sys.version_info[0] < 3:
-        expr = raw_input("")
-    else: expr = input("")
-
     parser = argparse.ArgumentParser(description="Please consult the README for help.")
     parser.add_argument('-v', action='store_true')
+    parser.add_argument('-b', '--backend', choices=sorted(BACKENDS), default='z3')
+    parser.add_argument('-m', '--minimise', action='store_true')
+    parser.add_argument('--fused', action='store_true')
+    parser.add_argument('--batch', metavar='FILE|DIR', nargs='+')
 
     args = parser.parse_args()
-    if expr:
-        print(prove(expr, args.v))
+    if args.batch:
+        for path in args.batch:
+            for result in prove_many(read_formulas(path), args.backend, args.minimise, args.fused):
+                sys.stdout.write(json.dumps(result) + "\n")
+                sys.stdout.flush()
+    else:
+        if sys.version_info[0] < 3:
+            expr = raw_input("")
+        else: expr = input("")
+
+        if expr:
+            try:
+                print(prove(expr, args.v, args.backend, args.minimise, args.fused))
+            except ParseError as e:
+                sys.stderr.write(str(e) + '\n')
+                sys.exit(1)
 
@@ -0,0 +1,146 @@
+"""
+Module of a pool of prover worker processes.
+Each worker proves one formula at a time with main.prove_many, and is reused for the next formula. A worker that
+runs past the time limit or grows past the memory limit is killed from the parent and replaced, so limits need no
+signal handlers in the worker and a runaway proof never holds up the rest of the pool.
+"""
+import os
+import time
+import multiprocessing
+from multiprocessing.connection import wait
+
+POLL_INTERVAL = 0.1  # seconds between checks of running workers
+
+
+def worker_main(conn, backend, minimise):
+    """
+    Loop of a worker process: receive a (name, formula) task, send back its result dictionary, until sent None.
+    """
+    from main import prove_many
+
+    while True:
+        task = conn.recv()
+        if task is None: break
+        conn.send(next(prove_many([task], backend, minimise)))
+
+
+class Worker(object):
+    def __init__(self, context, backend, minimise):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=worker_main, args=(child_conn, backend, minimise), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.task, self.start = None, None
+
+    def send(self, task):
+        self.task, self.start = task, time.time()
+        self.conn.send(task)
+
+    def rss(self):
+        """
+        :return resident memory of the worker in bytes, or None where /proc is not available
+        """
+        try:
+            with open("/proc/%d/statm" % self.process.pid) as statm:
+                return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, IndexError):
+            return None
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+    def close(self):
+        try:
+            self.conn.send(None)
+        except (OSError, EOFError):
+            pass
+        self.process.join(1)
+        if self.process.is_alive(): self.process.kill()
+        self.conn.close()
+
+
+class ProverPool(object):
+    def __init__(self, workers=None, time_limit=None, memory_limit=None, backend='z3', minimise=False):
+        """
+        :param workers: number of worker processes, defaults to one per core
+        :param time_limit: wall clock seconds allowed per formula, or None
+        :param memory_limit: resident bytes allowed per worker, or None
+        :param backend: name of the SAT solver backend used by k_prove
+        :param minimise: minimise the unsat cores of closed branches in k_prove
+        """
+        self.size = workers or os.cpu_count() or 1
+        self.time_limit, self.memory_limit = time_limit, memory_limit
+        self.backend, self.minimise = backend, minimise
+        self.context = multiprocessing.get_context()
+        self.idle = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        for worker in self.idle: worker.close()
+        self.idle = []
+
+    def prove(self, tasks):
+        """
+        :param tasks: iterable of tuples (name, formula)
+
+        :return generator of result dictionaries as main.prove_many, in order of completion. A formula over a limit
+        has the result timeout or memory, and one whose worker died has the result error.
+        Workers are kept for later calls until the pool is closed.
+        """
+        tasks = iter(tasks)
+        idle, busy = self.idle, []
+        pending = True
+
+        try:
+            while pending or busy:
+                # hand out tasks to idle workers, starting workers up to the pool size
+                while pending and (idle or len(busy) < self.size):
+                    task = next(tasks, None)
+                    if task is None:
+                        pending = False
+                        break
+                    worker = idle.pop() if idle else Worker(self.context, self.backend, self.minimise)
+                    worker.send(task)
+                    busy.append(worker)
+
+                if not busy: break
+                ready = wait([worker.conn for worker in busy], timeout=POLL_INTERVAL)
+
+                for worker in list(busy):
+                    result = None
+                    if worker.conn in ready:
+                        try:
+                            result = worker.conn.recv()
+                        except (EOFError, OSError):
+                            result = self.failed(worker, "error", "worker exited")
+                    elif self.time_limit and time.time() - worker.start > self.time_limit:
+                        result = self.failed(worker, "timeout")
+                    elif self.memory_limit and (worker.rss() or 0) > self.memory_limit:
+                        result = self.failed(worker, "memory")
+
+                    if result is not None:
+                        busy.remove(worker)
+                        if worker.process.is_alive(): idle.append(worker)
+                        yield result
+        finally:
+            # tasks still running when the caller stops listening are abandoned
+            for worker in busy: worker.kill()
+
+    def failed(self, worker, result, error=None):
+        """
+        Kills the worker of a task that cannot complete; it is replaced when the next task is handed out.
+
+        :return result dictionary of the task
+        """
+        worker.kill()
+        failure = {'name': worker.task[0], 'result': result}
+        if error: failure['error'] = error
+        failure['time'] = round(time.time() - worker.start, 6)
+        return failure
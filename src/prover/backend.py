@@ -0,0 +1,180 @@
+"""
+Module of SAT solver backends for the prover.
+A backend is a solver session: hard constraints are added once, and each check may take assumptions that only hold
+for that check, and preferences that are satisfied where possible.
+Clauses and literals are given as signed ids of the proof's symbol table.
+z3 is imported by the first z3 session, see import_z3, so that proofs with the cdcl backend, and formulas decided
+before any check, never load it.
+"""
+from prover.cdcl import CDCLSolver
+
+# outcomes of a check, z3's are translated to these
+sat = 'sat'
+unsat = 'unsat'
+
+z3 = None  # z3 module, once imported
+
+
+def import_z3():
+    """
+    :return z3 module, imported on the first call
+    """
+    global z3
+    if z3 is None:
+        import z3 as z3_module
+        z3 = z3_module
+    return z3
+
+
+class Backend(object):
+    """ Plain satisfiability checks. Preferences are passed as assumptions, and dropped as they appear in the core.
+    Subclasses provide add_clauses, and solve, get_model and get_core for a single check.
+    """
+    def __init__(self, symbols):
+        self.symbols = symbols
+        self.last_model, self.last_core = None, []
+
+    def check(self, assumptions=(), preferences=None):
+        """
+        :param assumptions: list of literals that must hold for this check
+        :param preferences: list of literals we prefer satisfied, but not necessary
+
+        :return sat or unsat
+        """
+        assumptions = list(assumptions)
+        preferred = get_literals(preferences)
+
+        while True:
+            if self.solve(assumptions + preferred):
+                self.last_model = self.get_model()
+                return sat
+
+            # drop one preference responsible for the conflict and try again
+            core = self.get_core(assumptions + preferred)
+            conflict = [lit for lit in preferred if lit in core]
+            if not conflict:
+                self.last_model, self.last_core = None, core
+                return unsat
+            preferred.remove(conflict[0])
+
+    def model(self):
+        return self.last_model
+
+    def unsat_core(self):
+        """ Assumptions of the last unsat check that are responsible for the conflict.
+        """
+        return self.last_core
+
+
+class Z3Backend(Backend):
+    """ Checks with a plain z3 Solver.
+    """
+    def __init__(self, symbols):
+        Backend.__init__(self, symbols)
+        self.solver = import_z3().Solver()
+
+    def add_clauses(self, clauses):
+        """
+        :param clauses: list of clauses, each a tuple of signed ids
+        """
+        self.solver.add([self.symbols.z3_clause(clause) for clause in clauses])
+
+    def solve(self, lits):
+        return self.solver.check([self.symbols.z3_lit(lit) for lit in lits]) == z3.sat
+
+    def get_model(self):
+        """
+        :return dictionary of atom id to truth value, for the atoms of the z3 model
+        """
+        model = self.solver.model()
+        return dict((self.symbols.atom_id(d.name()), z3.is_true(model[d])) for d in model.decls())
+
+    def get_core(self, lits):
+        """
+        :param lits: literals passed to the last check
+
+        :return literals that are in the z3 unsat core
+        """
+        core = set(expr.get_id() for expr in self.solver.unsat_core())
+        return [lit for lit in lits if self.symbols.z3_lit(lit).get_id() in core]
+
+
+class Z3OptimizeBackend(Z3Backend):
+    """ Preferences are applied as weighted soft constraints, solved by z3 as a MaxSAT problem.
+    """
+    def __init__(self, symbols):
+        Z3Backend.__init__(self, symbols)
+        self.solver = z3.Optimize()
+
+    def check(self, assumptions=(), preferences=None):
+        # soft constraints only apply to this check, so are scoped
+        if preferences:
+            self.solver.push()
+            for lit in get_literals(preferences): self.solver.add_soft(self.symbols.z3_lit(lit), 1)
+
+        sat_check = sat if self.solver.check([self.symbols.z3_lit(lit) for lit in assumptions]) == z3.sat else unsat
+        if sat_check == sat:
+            self.last_model = self.get_model()
+        else:
+            self.last_model, self.last_core = None, self.get_core(assumptions)
+
+        if preferences: self.solver.pop()
+
+        return sat_check
+
+
+class CDCLBackend(Backend):
+    """ Checks with the native CDCL solver of prover.cdcl, in process and without z3.
+    """
+    def __init__(self, symbols):
+        Backend.__init__(self, symbols)
+        self.solver = CDCLSolver()
+
+    def add_clauses(self, clauses):
+        """
+        :param clauses: list of clauses, each a tuple of signed ids
+        """
+        for clause in clauses: self.solver.add_clause(clause)
+
+    def solve(self, lits):
+        return self.solver.solve(lits)
+
+    def get_model(self):
+        """
+        :return dictionary of atom id to truth value, for the atoms the clauses and assumptions depend on
+        """
+        return self.solver.model()
+
+    def get_core(self, lits):
+        return self.solver.core
+
+
+# backend used for weighted preferences, where a backend is asked for a preferred model of a fixed problem
+Z3Backend.optimiser = Z3OptimizeBackend
+CDCLBackend.optimiser = CDCLBackend
+
+BACKENDS = {
+    'z3': Z3Backend,
+    'z3-opt': Z3OptimizeBackend,
+    'cdcl': CDCLBackend,
+}
+
+
+def get_backend(name):
+    """
+    :param name: name of a backend, see BACKENDS
+
+    :return backend class
+    """
+    assert name in BACKENDS, "Unknown solver backend: %s" % name
+    return BACKENDS[name]
+
+
+def get_literals(preferences):
+    """
+    :param preferences: iterable of literals, which may include python booleans for verum and falsum
+
+    :return list of literals; verum always holds and falsum never can, so neither is kept
+    """
+    if not preferences: return []
+    return [lit for lit in preferences if not isinstance(lit, bool)]
@@ -0,0 +1,290 @@
+"""
+Module of a native CDCL SAT solver, used as an in-process backend for the prover.
+Literals are signed integers per the symbol table; the solver has two watched literals per clause, first UIP clause
+learning, activity based branching with phase saving, and checks under assumptions with a core on failure.
+"""
+
+import heapq
+
+SAT, UNSAT = True, False
+
+
+class CDCLSolver(object):
+    def __init__(self):
+        self.problem = []           # clauses as added, for reducing models
+        self.clauses = []           # clauses as lists of literals, first two literals are watched
+        self.watches = {}           # literal -> clauses watching it
+        self.value = {}             # variable -> True/False, unassigned variables are absent
+        self.level = {}             # variable -> decision level of assignment
+        self.reason = {}            # variable -> clause that implied it, None for decisions
+        self.activity = {}          # variable -> branching activity
+        self.phase = {}             # variable -> last assigned value
+        self.trail = []
+        self.trail_lim = []
+        self.qhead = 0
+        self.inc = 1.0
+        self.order = []             # heap of (-activity, variable), may hold stale entries
+        self.conflicts = 0
+        self.inconsistent = False
+        self.assumptions = []
+        self.core = []
+
+    # --- building ---
+
+    def new_var(self, var):
+        if var not in self.activity:
+            self.activity[var] = 0.0
+            self.phase[var] = False
+            heapq.heappush(self.order, (0.0, var))
+            self.watches.setdefault(var, [])
+            self.watches.setdefault(-var, [])
+
+    def add_clause(self, lits):
+        """
+        :param lits: iterable of literals, a disjunction
+
+        :return False if the solver has become inconsistent
+        """
+        if self.inconsistent: return False
+        self.backtrack(0)
+        self.problem.append(tuple(lits))
+
+        clause = []
+        for lit in lits:
+            self.new_var(abs(lit))
+            if -lit in clause or self.lit_value(lit) is True and self.level[abs(lit)] == 0:
+                return True  # tautology or satisfied at the root
+            if lit not in clause and not (self.lit_value(lit) is False and self.level[abs(lit)] == 0):
+                clause.append(lit)
+
+        if not clause:
+            self.inconsistent = True
+        elif len(clause) == 1:
+            self.enqueue(clause[0], None)
+            if self.propagate() is not None: self.inconsistent = True
+        else:
+            self.attach(clause)
+        return not self.inconsistent
+
+    def attach(self, clause):
+        self.clauses.append(clause)
+        self.watches[-clause[0]].append(clause)
+        self.watches[-clause[1]].append(clause)
+
+    # --- assignment ---
+
+    def lit_value(self, lit):
+        val = self.value.get(abs(lit))
+        if val is None: return None
+        return val if lit > 0 else not val
+
+    def enqueue(self, lit, reason):
+        var = abs(lit)
+        self.value[var] = lit > 0
+        self.level[var] = len(self.trail_lim)
+        self.reason[var] = reason
+        self.trail.append(lit)
+
+    def backtrack(self, level):
+        if len(self.trail_lim) <= level: return
+        stop = self.trail_lim[level]
+        for lit in self.trail[stop:]:
+            var = abs(lit)
+            self.phase[var] = self.value.pop(var)
+            del self.level[var]
+            del self.reason[var]
+            heapq.heappush(self.order, (-self.activity[var], var))
+        del self.trail[stop:]
+        del self.trail_lim[level:]
+        self.qhead = min(self.qhead, stop)
+
+    def propagate(self):
+        """
+        :return conflicting clause, or None once every implication is on the trail
+        """
+        while self.qhead < len(self.trail):
+            false_lit = -self.trail[self.qhead]
+            self.qhead += 1
+            watching = self.watches[-false_lit]
+            kept = []
+            i = 0
+            while i < len(watching):
+                clause = watching[i]
+                i += 1
+                # make sure the false literal is the second watch
+                if clause[0] == false_lit:
+                    clause[0], clause[1] = clause[1], clause[0]
+                first = clause[0]
+                if self.lit_value(first) is True:
+                    kept.append(clause)
+                    continue
+                # look for a new literal to watch
+                for k in range(2, len(clause)):
+                    if self.lit_value(clause[k]) is not False:
+                        clause[1], clause[k] = clause[k], clause[1]
+                        self.watches[-clause[1]].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if self.lit_value(first) is False:
+                        kept.extend(watching[i:])
+                        self.watches[-false_lit] = kept
+                        return clause
+                    self.enqueue(first, clause)
+            self.watches[-false_lit] = kept
+        return None
+
+    # --- search ---
+
+    def analyse(self, conflict):
+        """ First UIP conflict analysis.
+
+        :return learnt clause with the asserting literal first, and the level to backjump to
+        """
+        learnt, seen = [None], set()
+        counter, lit, index = 0, None, len(self.trail) - 1
+        level = len(self.trail_lim)
+
+        while True:
+            for q in conflict:
+                if lit is not None and q == lit: continue
+                var = abs(q)
+                if var not in seen and self.level[var] > 0:
+                    seen.add(var)
+                    self.bump(var)
+                    if self.level[var] >= level:
+                        counter += 1
+                    else:
+                        learnt.append(q)
+            # next literal on the trail to resolve on
+            while abs(self.trail[index]) not in seen: index -= 1
+            lit = self.trail[index]
+            index -= 1
+            seen.discard(abs(lit))
+            counter -= 1
+            if counter == 0: break
+            conflict = self.reason[abs(lit)]
+
+        learnt[0] = -lit
+        if len(learnt) == 1: return learnt, 0
+
+        # second watch is the literal of the highest remaining level
+        top = max(range(1, len(learnt)), key=lambda k: self.level[abs(learnt[k])])
+        learnt[1], learnt[top] = learnt[top], learnt[1]
+        return learnt, self.level[abs(learnt[1])]
+
+    def analyse_final(self, lit, assumptions):
+        """
+        :param lit: assumption literal found false
+
+        :return subset of assumptions that implies the negation of lit, with lit
+        """
+        core = {lit}
+        if not self.trail_lim: return [lit]
+        seen = {abs(lit)}
+        for t in reversed(self.trail[self.trail_lim[0]:]):
+            var = abs(t)
+            if var not in seen: continue
+            reason = self.reason[var]
+            if reason is None:
+                if self.level[var] > 0: core.add(t)
+            else:
+                for q in reason:
+                    if self.level[abs(q)] > 0: seen.add(abs(q))
+        return [a for a in assumptions if a in core]
+
+    def bump(self, var):
+        self.activity[var] += self.inc
+        if self.activity[var] > 1e100:
+            for v in self.activity: self.activity[v] *= 1e-100
+            self.inc *= 1e-100
+            self.order = [(-act, v) for v, act in self.activity.items() if v not in self.value]
+            heapq.heapify(self.order)
+        elif var not in self.value:
+            heapq.heappush(self.order, (-self.activity[var], var))
+
+    def decay(self):
+        self.inc /= 0.95
+
+    def pick_branch(self):
+        while self.order:
+            var = heapq.heappop(self.order)[1]
+            if var not in self.value:
+                return var if self.phase[var] else -var
+        return None
+
+    def solve(self, assumptions=()):
+        """
+        :param assumptions: list of literals that must hold for this check
+
+        :return SAT or UNSAT; the model or core is then available
+        """
+        self.core = []
+        self.assumptions = list(assumptions)
+        if self.inconsistent: return UNSAT
+        self.backtrack(0)
+        for lit in assumptions: self.new_var(abs(lit))
+        if self.propagate() is not None:
+            self.inconsistent = True
+            return UNSAT
+
+        restart_limit = 100
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                restart_limit -= 1
+                if not self.trail_lim:
+                    self.inconsistent = True
+                    return UNSAT
+                learnt, back_level = self.analyse(conflict)
+                self.backtrack(back_level)
+                if len(learnt) == 1:
+                    self.enqueue(learnt[0], None)
+                else:
+                    self.attach(learnt)
+                    self.enqueue(learnt[0], learnt)
+                self.decay()
+                continue
+
+            if restart_limit <= 0:
+                restart_limit = 100 + self.conflicts // 2
+                self.backtrack(0)
+
+            # assumptions are decided first, one level each
+            next_lit = None
+            while len(self.trail_lim) < len(assumptions):
+                lit = assumptions[len(self.trail_lim)]
+                val = self.lit_value(lit)
+                if val is True:
+                    self.trail_lim.append(len(self.trail))  # dummy level
+                elif val is False:
+                    self.core = self.analyse_final(lit, assumptions)
+                    return UNSAT
+                else:
+                    next_lit = lit
+                    break
+
+            if next_lit is None:
+                next_lit = self.pick_branch()
+                if next_lit is None: return SAT
+
+            self.trail_lim.append(len(self.trail))
+            self.enqueue(next_lit, None)
+
+    def model(self):
+        """ Model of the last SAT check, reduced to the assumptions and a true literal of each clause added.
+        Any other variable is free, so is left out, as z3 does for don't care atoms.
+
+        :return dictionary of variable to truth value
+        """
+        cover = set(self.assumptions)
+        # clauses with a single true literal need it, the rest are covered greedily
+        rest = []
+        for clause in self.problem:
+            true_lits = [lit for lit in clause if self.lit_value(lit) is True]
+            if len(true_lits) == 1: cover.add(true_lits[0])
+            else: rest.append(true_lits)
+        for true_lits in rest:
+            if not any(lit in cover for lit in true_lits): cover.add(true_lits[0])
+        return dict((abs(lit), lit > 0) for lit in cover)
@@ -1,66 +1,114 @@
+import copy
+
 from utilities import is_atomic, is_complex, my_isinstance
-from parser import TOP, BOTTOM, Modality
-from z3 import *
+from formula import BOX, DIA, NOT, MODAL, TRUE, FALSE
+from prover.backend import get_backend, sat, unsat
+from prover.symbols import SymbolTable
+
+# shrink the unsat core of a closed branch to a minimal set of offending modal literals
+MINIMISE_CORES = False
 
 
-def k_prove(modal_clause):
+def k_prove(modal_clause, backend='z3', minimise=MINIMISE_CORES):
     assert isinstance(modal_clause, dict), "k_prove wrong input type: %s" % modal_clause
+    trivial = decide_trivially(modal_clause)
+    if trivial is not None: return trivial
+
     try:
-        return modal_prove(modal_clause, dict(), [], dict(), dict(), dict(), 0)
+        return modal_prove(modal_clause, dict(), dict(), [], dict(), dict(), 0, get_backend(backend), SymbolTable(),
+                           minimise)
     except Exception as e:
         print("Exception in proving function: ", e)
         raise SystemExit(1)
 
 
-def modal_prove(modal_clause, w_set_dict, active_modalities, current_val, used_vals, z3_const_dict, w):
+def decide_trivially(modal_clause):
+    """
+    :param modal_clause: dictionary of disjunctions at each modal context.
+
+    :return unsat if a clause of the initial world is falsum, sat if every clause is verum, otherwise None.
+    Formulas simplified to verum or falsum are among these, and are decided without a solver session, so without
+    loading z3.
+    """
+    verum = True
+
+    for w, w_modal_clauses in modal_clause.items():
+        for clause in w_modal_clauses:
+            values = [get_constant(disjunct) for disjunct in clause.disjuncts]
+            if True in values: continue
+            if w == 0 and all(value is False for value in values): return unsat
+            verum = False
+
+    return sat if verum else None
+
+
+def get_constant(literal):
+    """
+    :return truth value of a literal of verum or falsum, None for any other literal.
+    """
+    if literal.op == NOT: literal, negated = literal.left, True
+    else: negated = False
+
+    if literal is TRUE: return not negated
+    if literal is FALSE: return negated
+    return None
+
+
+def modal_prove(modal_clause, w_set_dict, compiled_dict, active_modalities, current_val, solver_dict, w, backend, symbols,
+                minimise):
     """
     Given constraint set A at w, we use a SAT solver to find a satisfying valuation.
 
     :param modal_clause: dictionary of disjunctions at each modal context.
     :param w_set_dict: dictionary of clausal sets (A, ID, IB, D) at each w.
+    :param compiled_dict: dictionary of the constraints at each w translated to signed ids, see compile_constraints.
     :param active_modalities: classical literals nested beneath active modalities in the prior w depth.
     :param current_val: dictionary of satisfying valuations at each depth w - active OR branch.
-    :param used_vals: dictionary of valuations for closed OR branches - req. to generate new modals from sat solver.
-    :param z3_const_dict: dictionary of z3 appropriate BOOL constraints to add for each depth w.
+    :param solver_dict: dictionary of solver sessions for each depth w. A session holds the constraints of w and
+    the blocking clauses for closed OR branches, and persists across the valuations enumerated at w.
+    Active modalities are held as assumptions of the session, see get_assumptions.
     :param w: node depth relative to tableau tree.
+    :param backend: solver backend class, used to open the session for w.
+    :param symbols: symbol table of the proof, mapping classical atoms to ids.
+    :param minimise: shrink the unsat core of a closed branch, see get_modal_offenders.
 
-    :return a z3 object SAT or a set of contradicting modal literals if UNSAT.
+    :return sat, or a set of contradicting modal literals if unsat.
     """
 
-    # a_z3_constraints stores constraint set A specific to w
-    z3_const_dict[w], a_z3_constraints = set(), set()
-
-    for d in (current_val, used_vals):  # initialise keys for respective dictionaries
-        if w not in d.keys(): d[w] = None
-
     # get constraints set from modal clause for w
-    if w not in w_set_dict.keys(): w_set_dict[w] = get_constraints(modal_clause, w)
+    if w not in w_set_dict.keys():
+        w_set_dict[w] = get_constraints(modal_clause, w)
+        # constraints are translated once, every session at w reuses them
+        compiled_dict[w] = compile_constraints(w_set_dict[w], symbols)
 
     # if no constraints at w, return sat
     if not w_set_dict[w] and not active_modalities:
         return sat
     else:
-        # activated modal constraint are a list of atoms - conjunction
-        if active_modalities:
-            z3_const_dict[w].add((And(set(get_bool(atom) for atom in active_modalities))))
+        # activated modal constraint are a list of atoms - conjunction, tracked as assumptions
+        assumptions = get_assumptions(active_modalities, symbols)
+        if assumptions is None:
+            # a falsum is nested beneath an active modality
+            return set(atom for atom in active_modalities if symbols.lit(atom) is False)
 
-        # constraint set {A} comprise conjunctions of classical disjunctions
-        for modal_fml in w_set_dict[w]['A']:
-            a_z3_constraints.add(Or(set(get_bool(atom) for atom in modal_fml.disjuncts)))
+        # new session for w, as the active modalities from the prior depth have changed
+        solver_dict[w] = backend(symbols), assumptions
 
-        z3_const_dict[w].add(And(a_z3_constraints))
+        # constraint set {A} comprise conjunctions of classical disjunctions
+        solver_dict[w][0].add_clauses(compiled_dict[w]['clauses'])
 
         # get valuation from sat solver
-        sat_check, current_val[w], used_vals[w] = get_valuation(z3_const_dict[w], current_val[w], used_vals[w])
+        sat_check, current_val[w] = get_valuation(solver_dict[w][0], None, assumptions=assumptions)
         if sat_check == sat:
-            return modal_check(modal_clause, w_set_dict, current_val, used_vals, z3_const_dict, w)
+            return modal_check(modal_clause, w_set_dict, compiled_dict, current_val, solver_dict, w, backend, symbols,
+                               minimise)
         else:
             # get modal literals responsible for (id) instances
-            offending_atoms = get_modal_offenders(a_z3_constraints, active_modalities)
+            offending_atoms = get_modal_offenders(*solver_dict[w], minimise=minimise)
             return offending_atoms
 
 
-def modal_check(modal_clause, w_set_dict, current_val, used_vals, z3_const_dict, w):
+def modal_check(modal_clause, w_set_dict, compiled_dict, current_val, solver_dict, w, backend, symbols, minimise):
     """
     Checks which modal literals are activate at depth of w given the current valuation.
     If active diamonds are found, the TRANS rule is applied. All diamond branches must remain open.
@@ -70,19 +118,20 @@ def modal_check(modal_clause, w_set_dict, current_val, used_vals, z3_const_dict,
     w1 = w + 1
 
     # Get tuple comprising set of true literals and set of false literals
-    valuation = process_model(current_val[w])
+    valuation = process_model(current_val[w], symbols)
 
     # block as many modalities as possible whilst maintaining satisfiability.
-    implied_modalities = get_active_modalities(w_set_dict[w]['IB'].union(w_set_dict[w]['ID']), valuation)
+    implied_modalities = get_active_modalities(w_set_dict[w]['IB'].union(w_set_dict[w]['ID']), valuation, symbols,
+                                               backend.optimiser)
     for imp in implied_modalities:
-        if repr(imp[0][0]) == 'box':
-            box_atoms.add(imp[0][1])  # active implied boxes
+        if imp[0].op == BOX:
+            box_atoms.add(imp[0].left)  # active implied boxes
         else:
-            active_diamonds.add(imp[0][1])  # active implied diamonds
+            active_diamonds.add(imp[0].left)  # active implied diamonds
     # non implied diamonds
     for clause in w_set_dict[w]['D']:
         modal_atom = clause.disjuncts[0]
-        active_diamonds.add((modal_atom[1]))
+        active_diamonds.add(modal_atom.left)
 
     # for each diamond apply trans rule; note: this results in an AND branching
     if not active_diamonds: return sat
@@ -92,8 +141,8 @@ def modal_check(modal_clause, w_set_dict, current_val, used_vals, z3_const_dict,
         active_modalities.add(diamond)
 
         # if diamond is unsat, entire branch is unsat. Look for new valuation for w.
-        diamond_check = modal_prove(modal_clause, w_set_dict, active_modalities, current_val, used_vals, z3_const_dict,
-                                    w1)
+        diamond_check = modal_prove(modal_clause, w_set_dict, compiled_dict, active_modalities, current_val,
+                                    solver_dict, w1, backend, symbols, minimise)
         if diamond_check != sat:  # if sat, then move to next TRAN branch
             if diamond_check is None:
                 # if diamond_check is none, then an (id) contained in the const set A of w1 - tableau closed
@@ -103,80 +152,127 @@ def modal_check(modal_clause, w_set_dict, current_val, used_vals, z3_const_dict,
                     # antecedents responsible for contradicting modal literals
                     triggers = get_modal_triggers(diamond_check, implied_modalities)
                     for atom in triggers:
-                        if not my_isinstance(atom, bool): block_modalities.add(get_bool(atom))
+                        if not my_isinstance(atom, bool): block_modalities.add(symbols.lit(atom))
 
                 # ask for new valuation for w
-                used_vals[w1] = None
-                sat_check, current_val[w], used_vals[w] = get_valuation(z3_const_dict[w], current_val[w], used_vals[w],
-                                                                        block_modalities)
+                current_val[w1] = None
+                solver, assumptions = solver_dict[w]
+                sat_check, current_val[w] = get_valuation(solver, current_val[w], block_modalities, assumptions,
+                                                          compiled_dict[w]['antecedents'])
                 if sat_check == sat and (len(current_val[w]) > 0):
-                    return modal_check(modal_clause, w_set_dict, current_val, used_vals, z3_const_dict, w)
+                    return modal_check(modal_clause, w_set_dict, compiled_dict, current_val, solver_dict, w, backend,
+                                       symbols, minimise)
                 else:
                     return unsat
         else:
-            current_val[w1], used_vals[w1] = None, None
+            current_val[w1] = None
 
     return sat
 
 
-def get_valuation(w_constraints, current_val, used_vals, soft_constraints=None):
+def get_valuation(solver, current_val, soft_constraints=None, assumptions=(), relevant=None):
     """
-    :param w_constraints: set constraints to add into Solver for depth w
-    :param current_val: set current model for depth w.
-    :param used_vals: set previously proposed model for depth w
-    :param soft_constraints: set of atoms we prefer satisfied, but not necessary
+    :param solver: solver backend session for depth w, holding the constraints and blocking clauses added so far
+    :param current_val: current model for depth w, as a dictionary of atom id to truth value.
+    :param soft_constraints: set of literals we prefer satisfied, but not necessary
+    :param assumptions: list of tuples (literal, modal atom) that must hold for this check
+    :param relevant: set of atom ids the current model is blocked on, defaults to every atom of the model.
+    Valuations that agree on the antecedents of the modal implications activate the same modalities, so have the
+    same outcome; any atom the model leaves out is free, and can only activate further modalities.
 
     :return updated model based on constraints and previously generated valuations
 
     Adapted per https://stackoverflow.com/questions/11867611/z3py-checking-all-solutions-for-equation
     """
-    if not used_vals: used_vals = set()
-
-    # create instance of Solver s, and add constraints for depth w
-    s = Optimize()
-    s.add(w_constraints)
-
     if current_val:
-        temp = set()
-        for d in current_val:
-            # d is a declaration
-            if d.arity() > 0:
-                raise Z3Exception("uninterpreted functions are not supported")
-            # create a constant from declaration
-            c = d()
-            if is_array(c) or c.sort().kind() == Z3_UNINTERPRETED_SORT:
-                raise Z3Exception("arrays and uninterpreted sorts are not supported")
-            temp.add(c != current_val[d])
-        used_vals.add(Or(temp))
-        s.add(used_vals)
-
-    if soft_constraints: (s.add_soft(And(c), 0.95) for c in soft_constraints)
-
-    # return new sat model if found    
-    if s.check() == sat:
-        current_val = s.model()
+        # blocking clause is kept by the session for all later valuations at w
+        solver.add_clauses([tuple(-atom_id if value else atom_id for atom_id, value in current_val.items()
+                                  if relevant is None or atom_id in relevant)])
+
+    # return new sat model if found; soft constraints only apply to this valuation
+    sat_check = solver.check([lit for lit, _ in assumptions], soft_constraints)
+    if sat_check == sat:
+        current_val = solver.model()
     else:
         current_val = []
 
-    return s.check(), current_val, used_vals
+    return sat_check, current_val
 
 
-def get_modal_offenders(a_const_set, modal_atoms):
+def get_modal_offenders(solver, assumptions, minimise=MINIMISE_CORES):
+    """
+    :param solver: solver backend session for given w, where the last check was unsat
+    :param assumptions: list of tuples (literal, modal atom) for the active modal literals at given w
+    :param minimise: shrink the core until each literal is necessary
+
+    :return set of modal literals causing contradiction.
+    If the constraint set A of w is unsat on its own the core is empty, and every active modal literal is returned,
+    so that the prior depth still prefers valuations deactivating them.
+    """
+    core = set(solver.unsat_core())
+    if not core: return set(atom for _, atom in assumptions)
+
+    if minimise:
+        # deletion based minimisation; drop each literal the remaining core is still unsat without
+        for lit, _ in assumptions:
+            if lit not in core: continue
+            reduced = [a for a, _ in assumptions if a in core and a != lit]
+            if solver.check(reduced) == unsat:
+                core = set(solver.unsat_core())
+
+    return set(atom for lit, atom in assumptions if lit in core)
+
+
+def get_assumptions(modal_atoms, symbols):
     """
-    :param a_const_set: constraint set A for given w
     :param modal_atoms: set of active modal literals at given w
+    :param symbols: symbol table of the proof
 
-    :return set of modal literals causing contradiction
+    :return list of tuples (literal, modal atom), or None if a modal literal is falsum.
+    Verum literals always hold, so are not tracked.
     """
-    offenders = set()
+    assumptions = []
 
     for modal_atom in modal_atoms:
-        bool_atom = get_bool(modal_atom)
-        a_const_set.add(And(bool_atom))
-        id_check = get_valuation(a_const_set, set(), set())[0]
-        if id_check == unsat: offenders.add(modal_atom)
+        lit = symbols.lit(modal_atom)
+        if lit is False: return None
+        if lit is not True: assumptions.append((lit, modal_atom))
+
+    return assumptions
+
+
+def compile_constraints(constraint_sets, symbols):
+    """
+    :param constraint_sets: dictionary of clausal sets (A, ID, IB, D) for given w
+    :param symbols: symbol table of the proof
 
-    return offenders
+    :return dictionary of A as clauses of signed ids, and the set of atom ids in antecedents of IB and ID.
+    """
+    antecedents = set()
+
+    for modal_clause in constraint_sets['IB'].union(constraint_sets['ID']):
+        for disjunct in modal_clause.disjuncts:
+            if is_complex(disjunct): continue
+            lit = symbols.lit(disjunct)
+            if not my_isinstance(lit, bool): antecedents.add(abs(lit))
+
+    return {'clauses': get_clauses(constraint_sets['A'], symbols), 'antecedents': antecedents}
+
+
+def get_clauses(a_const_set, symbols):
+    """
+    :param a_const_set: constraint set A for given w
+    :param symbols: symbol table of the proof
+
+    :return list of clauses as tuples of signed ids; tautologies are dropped.
+    """
+    clauses = []
+
+    for modal_fml in a_const_set:
+        clause = symbols.clause(modal_fml.disjuncts)
+        if clause is not True: clauses.append(clause)
+
+    return clauses
 
 
 def get_modal_triggers(offend_atoms, implied_modalities):
@@ -190,32 +286,35 @@ def get_modal_triggers(offend_atoms, implied_modalities):
 
     for atom in offend_atoms:
         for imp in implied_modalities:
-            if atom == imp[0][1]: triggers.add(imp[1])
+            if atom is imp[0].left: triggers.add(imp[1])
 
     return triggers
 
 
-def process_model(current_val):
+def process_model(current_val, symbols):
     """
     :param current_val: model generated by sat solver, atom is satisfied if in modal.
+    :param symbols: symbol table of the proof
 
     :return tuple of sets comprising true and false atoms.
     """
     true_atoms, false_atoms = set(), set()
 
-    for atom in current_val:
-        if current_val[atom]:
-            true_atoms.add(str(atom))
+    for atom_id, value in current_val.items():
+        if value:
+            true_atoms.add(symbols.names[atom_id])
         else:
-            false_atoms.add(str(atom))
+            false_atoms.add(symbols.names[atom_id])
 
     return true_atoms, false_atoms
 
 
-def get_active_modalities(modal_implications, valuation):
+def get_active_modalities(modal_implications, valuation, symbols, optimiser):
     """
     :param modal_implications: set of modal implications represented as clauses
     :param valuation: tuple of true set and false set
+    :param symbols: symbol table of the proof
+    :param optimiser: solver backend class used to deactivate modalities
 
     :return set of tuples representing active modal implications (modal atom, classical atom)
 
@@ -229,7 +328,7 @@ def get_active_modalities(modal_implications, valuation):
 
     # check potential to deactivate modalities
     # don't need maximality - that is, if atom is not in true_lits then can assume false.
-    return deactivate_modalities(active_modal, valuation)
+    return deactivate_modalities(active_modal, valuation, symbols, optimiser)
 
 
 def check_activation(modal_implication, valuation):
@@ -250,76 +349,65 @@ def check_activation(modal_implication, valuation):
     for disjunct in modal_implication.disjuncts:
         if not is_complex(disjunct):
             prop_atom = disjunct
-        elif my_isinstance(disjunct[0], Modality):
+        elif disjunct.op in MODAL:
             modal_atom = disjunct
 
     # check valuation of prop_atom, to determine num_modal_atoms activity
     # check if prop_atom is negated
-    if is_atomic(prop_atom) and str(prop_atom) not in true_literals:
+    if is_atomic(prop_atom) and prop_atom.name not in true_literals:
         # not negated
         return modal_atom, prop_atom
 
-    if not is_atomic(prop_atom) and str(prop_atom[1]) not in false_literals:
+    if not is_atomic(prop_atom) and prop_atom.left.name not in false_literals:
         return modal_atom, prop_atom
 
     return False
 
 
-def deactivate_modalities(active_modal_set, valuation):
+def deactivate_modalities(active_modal_set, valuation, symbols, optimiser):
     """
     :param active_modal_set: set of active modal implications (modal atom, classical atom)
+    :param valuation: tuple of true set and false set
+    :param symbols: symbol table of the proof
+    :param optimiser: solver backend class, asked for a model satisfying as many antecedents as possible
 
     :return list of modal implications that remain active, after trying to deactivate by satisfying antecedent.
     """
     active_modal = set()
 
-    s = Optimize()
-    # add current valuation to solver
-    s.add((And(set(Bool(lit) for lit in valuation[0]))))
-    s.add((And(set(Not(Bool(lit)) for lit in valuation[1]))))
+    # only antecedents over atoms outside the valuation are free to be satisfied
+    assigned = valuation[0].union(valuation[1])
+    if all(get_name(imp_modalities[1]) in assigned for imp_modalities in active_modal_set):
+        return active_modal_set
 
-    for imp_modalities in active_modal_set:
-        s.add_soft(And(get_bool(imp_modalities[1])), 1)
+    s = optimiser(symbols)
+    # add current valuation to solver
+    s.add_clauses([(symbols.atom_id(lit),) for lit in valuation[0]])
+    s.add_clauses([(-symbols.atom_id(lit),) for lit in valuation[1]])
 
-    s.check()
-    valuation = process_model(s.model())
+    s.check(preferences=[symbols.lit(imp_modalities[1]) for imp_modalities in active_modal_set])
+    valuation = process_model(s.model(), symbols)
 
     for imp_modalities in active_modal_set:
         prop_ante = imp_modalities[1]
-        if is_atomic(prop_ante) and (prop_ante not in valuation[0]):
+        if is_atomic(prop_ante) and (prop_ante.name not in valuation[0]):
             active_modal.add(imp_modalities)
-        if not is_atomic(prop_ante) and prop_ante[1] not in valuation[1]:
+        if not is_atomic(prop_ante) and prop_ante.left.name not in valuation[1]:
             active_modal.add(imp_modalities)
 
     return active_modal
 
 
-def get_bool(atom):
+def get_name(atom):
     """
     :param atom: parsed classical atom, can be negated
 
-    :return z3 appropriate boolean value
+    :return name of the underlying atom
     """
-    assert not is_complex(atom), "Error adding atom to sat solver: %s" % atom
-
-    # need to account for 'False' and 'True'
     if is_atomic(atom):
-        if atom == TOP:
-            return True
-        elif atom == BOTTOM:
-            return False
-        else:
-            return Bool(str(atom))
-    elif str(atom[0]) == '~':
-        if atom[1] == TOP:
-            return False
-        elif atom[1] == BOTTOM:
-            return True
-        else:
-            return Not(Bool(str(atom[1])))
-    else:  # error
-        sys.stderr.write('Error adding atom to sat solver: ' + str(atom) + '\n')
-        raise SystemExit(1)
+        return atom.name
+    else:
+        return atom.left.name
 
 
 def get_constraints(modal_clause_dict, w):
@@ -347,14 +435,14 @@ def get_constraints(modal_clause_dict, w):
                 if not is_complex(disjunction[0]):
                     A.add(modal_clause)
                 else:
-                    assert get_modality(disjunction) == 'dia', \
+                    assert get_modality(disjunction) == DIA, \
                         "Error in getting constraint sets - incorrectly formed modal clause: %s" % modal_clause
                     D.add(modal_clause)  # if complex, has to be single dia literal
             else:  # by deduction, only two disjuncts in modal_clause
                 mod = get_modality(disjunction)
-                if mod == 'box':
+                if mod == BOX:
                     IB.add(modal_clause)
-                elif mod == 'dia':
+                elif mod == DIA:
                     ID.add(modal_clause)
                 else:
                     A.add(modal_clause)
@@ -366,10 +454,9 @@ def get_modality(disjunctions):
     """
     :param disjunctions: list of disjunctions
 
-    :return first stripped modal literal
+    :return opcode of the first modal literal
     """
     for disjunct in disjunctions:
         if is_complex(disjunct):
-            connective = disjunct[0]
-            if my_isinstance(connective, Modality): return repr(connective)
+            if disjunct.op in MODAL: return disjunct.op
     return False
@@ -0,0 +1,90 @@
+"""
+Module of the symbol table used by the prover.
+Each classical atom of a proof is given a unique integer id, and literals are represented as signed ids, so that
+clauses can be passed to a solver backend without translating parsed atoms again.
+The z3 expressions of literals and clauses are only formed for the z3 backends, which have imported z3 by then.
+"""
+from utilities import is_atomic, is_complex
+from formula import TRUE, FALSE
+
+
+class SymbolTable(object):
+    def __init__(self):
+        self.ids = {}           # atom name -> id
+        self.names = [None]     # id -> atom name, ids start from 1
+        self.bools = [None]     # id -> z3 Bool of atom
+        self.nots = [None]      # id -> z3 negation of atom
+        self.clauses = {}       # clause -> z3 disjunction
+
+    def atom_id(self, name):
+        """
+        :param name: name of a classical atom
+
+        :return unique id of atom, the atom is added to the table if new
+        """
+        atom_id = self.ids.get(name)
+        if atom_id is None:
+            atom_id = len(self.names)
+            self.ids[name] = atom_id
+            self.names.append(name)
+            self.bools.append(None)
+            self.nots.append(None)
+        return atom_id
+
+    def lit(self, atom):
+        """
+        :param atom: parsed classical atom, can be negated
+
+        :return signed id of literal, or python boolean for verum and falsum
+        """
+        assert not is_complex(atom), "Error adding atom to symbol table: %s" % atom
+
+        if is_atomic(atom):
+            if atom is TRUE:
+                return True
+            elif atom is FALSE:
+                return False
+            else:
+                return self.atom_id(atom.name)
+        else:
+            lit = self.lit(atom.left)
+            return -lit if not isinstance(lit, bool) else not lit
+
+    def clause(self, disjuncts):
+        """
+        :param disjuncts: list of parsed classical atoms
+
+        :return tuple of signed ids, or True if the clause is a tautology
+        """
+        clause = []
+        for atom in disjuncts:
+            lit = self.lit(atom)
+            if lit is True: return True
+            if lit is not False and lit not in clause: clause.append(lit)
+        return tuple(clause)
+
+    def z3_lit(self, lit):
+        """
+        :param lit: signed id of literal
+
+        :return cached z3 expression of literal
+        """
+        atom_id = abs(lit)
+        if self.bools[atom_id] is None:
+            from z3 import Bool, Not
+            self.bools[atom_id] = Bool(self.names[atom_id])
+            self.nots[atom_id] = Not(self.bools[atom_id])
+        return self.bools[atom_id] if lit > 0 else self.nots[atom_id]
+
+    def z3_clause(self, clause):
+        """
+        :param clause: tuple of signed ids
+
+        :return cached z3 disjunction of clause
+        """
+        expr = self.clauses.get(clause)
+        if expr is None:
+            from z3 import Or, BoolVal
+            expr = Or([self.z3_lit(lit) for lit in clause]) if clause else BoolVal(False)
+            self.clauses[clause] = expr
+        return expr
@@ -0,0 +1,160 @@
+import os, sys, glob, time, random, argparse
+from subprocess import Popen, PIPE, TimeoutExpired
+
+bench_sub = '/benchmarks/'
+results_sub = "/results/"
+pattern = '*.k'
+
+TIME_LIM = 60
+BACKENDS = ["z3", "cdcl"]
+HEADING = "=".join(str("=") for a in range(25))
+VALID = "Psi is valid"
+NON_VALID = "Psi is NOT valid"
+
+
+def backend_test(l_type, output, backends=BACKENDS):
+    """ Prove each benchmark with every backend, and report where the outcomes disagree.
+    A benchmark that times out under some backend is not compared.
+    """
+    global HEADING
+
+    ancestor_path = get_parent_dir(os.path.abspath(__file__), 4)
+    prover_dir = get_parent_dir(os.path.abspath(__file__), 3)
+
+    bench_dir = str(ancestor_path + os.path.join(str(bench_sub), str(l_type)))
+    assert os.path.exists(bench_dir) == True, "The specified benchmark folder cannot be located."
+
+    if output:
+        file_name = "backends_" + time.strftime("%m%d-%H%M%S")
+        results_dir = get_parent_dir(os.path.abspath(__file__), 1) + os.path.join(str(results_sub))
+        output_file = results_dir + file_name + ".txt"
+        open(output_file, "w").close()
+
+    compared, mismatches = 0, 0
+    for folder in sorted(os.listdir(bench_dir)):
+        print("SUBFOLDER: " + str(folder).upper() + "\n" + HEADING)
+
+        # folders may nest further, each family is separated into provable and non-provable fml
+        for bfile in sorted(glob.glob(os.path.join(bench_dir, str(folder), '**', pattern), recursive=True)):
+            file_name = os.path.relpath(bfile, bench_dir)
+            req_outcome = os.path.basename(os.path.dirname(bfile))[-1:]
+            test_fml = file_import(bfile)
+
+            outcomes = [get_outcome(prover_dir, test_fml, backend) for backend in backends]
+            line = str(file_name) + ": " + ", ".join(b + " " + o for b, o in zip(backends, outcomes))
+
+            decided = [o for o in outcomes if o in ("valid", "not valid")]
+            if len(decided) == len(backends):
+                compared += 1
+                if len(set(decided)) > 1:
+                    mismatches += 1
+                    line += " MISMATCH"
+                elif req_outcome in ("p", "n") and decided[0] != ("valid" if req_outcome == "p" else "not valid"):
+                    line += " INCORRECT"
+
+            print(line)
+            if output:
+                with open(output_file, "a") as f: f.write(line + "\n")
+
+        print("\n")
+
+    summary = str(compared) + " compared, " + str(mismatches) + " mismatched"
+    print(summary)
+    if output:
+        with open(output_file, "a") as f: f.write(summary + "\n")
+    return mismatches
+
+
+def solver_test(cases, seed=0):
+    """ Check the CDCL solver against z3 on random CNFs, with clauses added between checks under assumptions.
+    Models must satisfy every clause and assumption, and cores must be unsat subsets of the assumptions.
+    """
+    sys.path.insert(0, get_parent_dir(os.path.abspath(__file__), 3))
+    from prover.cdcl import CDCLSolver
+    from z3 import Solver, Bool, Not, Or, sat
+
+    def z3_lit(lit): return Bool("x%d" % abs(lit)) if lit > 0 else Not(Bool("x%d" % abs(lit)))
+
+    rand = random.Random(seed)
+    checks = 0
+    for case in range(cases):
+        num_vars = rand.randint(1, 25)
+        num_clauses = rand.randint(1, num_vars * 5) // 3 + 1
+        cdcl, z3_solver, clauses = CDCLSolver(), Solver(), []
+
+        for _ in range(3):
+            for _ in range(num_clauses):
+                clause = [rand.choice([1, -1]) * rand.randint(1, num_vars) for _ in range(rand.randint(1, 4))]
+                clauses.append(clause)
+                cdcl.add_clause(clause)
+                z3_solver.add(Or([z3_lit(lit) for lit in clause]))
+
+            for _ in range(3):
+                assumptions = []
+                for _ in range(rand.randint(0, 5)):
+                    lit = rand.choice([1, -1]) * rand.randint(1, num_vars)
+                    if -lit not in assumptions and lit not in assumptions: assumptions.append(lit)
+
+                checks += 1
+                result = cdcl.solve(assumptions)
+                assert result == (z3_solver.check([z3_lit(lit) for lit in assumptions]) == sat), \
+                    "CDCL and z3 disagree on case %d: %s under %s" % (case, clauses, assumptions)
+                if result:
+                    model = cdcl.model()
+                    assert all(any(model.get(abs(lit)) == (lit > 0) for lit in clause) for clause in clauses), \
+                        "CDCL model does not satisfy case %d" % case
+                    assert all(model.get(abs(lit)) == (lit > 0) for lit in assumptions), \
+                        "CDCL model does not satisfy the assumptions of case %d" % case
+                else:
+                    assert set(cdcl.core) <= set(assumptions), "CDCL core is not a subset of the assumptions"
+                    assert z3_solver.check([z3_lit(lit) for lit in cdcl.core]) != sat, \
+                        "CDCL core is satisfiable in case %d" % case
+
+    print(str(cases) + " random CNFs, " + str(checks) + " checks agree with z3")
+
+
+def get_outcome(prover_dir, fml, backend):
+    """
+    :return valid, not valid, timed out, or error
+    """
+    popen = Popen([sys.executable, prover_dir + "/main.py", "-b", backend], stdin=PIPE, stdout=PIPE, stderr=PIPE)
+    try:
+        stdout, stderr = popen.communicate(str.encode(fml + "\n"), timeout=TIME_LIM)
+    except TimeoutExpired:
+        popen.kill()
+        popen.communicate()
+        return "timed out"
+
+    result = stdout.decode("utf-8")
+    if result.find(NON_VALID) >= 0: return "not valid"
+    if result.find(VALID) >= 0: return "valid"
+    return "error"
+
+
+def get_parent_dir(filepath, ancestor):
+    if ancestor == 0:
+        return filepath
+    else:
+        return get_parent_dir(os.path.abspath(os.path.join(filepath, os.pardir)), ancestor - 1)
+
+
+def file_import(filename):
+    assert os.path.exists(filename) == True, "The specified benchmark cannot be located."
+
+    with open(filename, "r") as fileobj:
+        return fileobj.read().rstrip("\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cross check the solver backends.")
+    parser.add_argument('l_type', nargs='?', default="all_subclasses", help="benchmark folder, '.' for all")
+    parser.add_argument('-t', '--time', type=int, default=TIME_LIM, help="time limit per proof in seconds")
+    parser.add_argument('-s', '--solver', type=int, metavar='CASES',
+                        help="check the CDCL solver on CASES random CNFs, instead of the benchmarks")
+    args = parser.parse_args()
+
+    if args.solver:
+        solver_test(args.solver)
+    else:
+        TIME_LIM = args.time
+        sys.exit(1 if backend_test(args.l_type, True) else 0)
@@ -0,0 +1,84 @@
+import os, sys, csv, glob, json, time, argparse
+
+bench_sub = '/benchmarks/'
+results_sub = "/results/"
+pattern = '*.k'
+
+TIME_LIM = 60
+FIELDS = ['name', 'expected', 'result', 'correct', 'time', 'error']
+
+
+def parallel_test(l_type, workers=None, time_limit=TIME_LIM, memory_limit=None, backend='z3', out_format='jsonl'):
+    """ Prove every benchmark of a folder on a pool of worker processes, writing one record per benchmark.
+
+    :param l_type: benchmark folder, '.' for all of them
+    :param workers: number of worker processes, defaults to one per core
+    :param time_limit: wall clock seconds allowed per benchmark
+    :param memory_limit: resident megabytes allowed per worker, or None
+    :param backend: name of the SAT solver backend
+    :param out_format: jsonl or csv
+
+    :return path of the results file
+    """
+    ancestor_path = get_parent_dir(os.path.abspath(__file__), 4)
+    prover_dir = get_parent_dir(os.path.abspath(__file__), 3)
+    sys.path.insert(0, prover_dir)
+    from pool import ProverPool
+
+    bench_dir = str(ancestor_path + os.path.join(str(bench_sub), str(l_type)))
+    assert os.path.exists(bench_dir) == True, "The specified benchmark folder cannot be located."
+    benchmarks = sorted(glob.glob(os.path.join(bench_dir, '**', pattern), recursive=True))
+
+    file_name = "parallel_" + time.strftime("%m%d-%H%M%S") + "." + out_format
+    output_file = get_parent_dir(os.path.abspath(__file__), 1) + os.path.join(str(results_sub)) + file_name
+
+    tasks = ((os.path.relpath(bfile, ancestor_path + bench_sub), file_import(bfile)) for bfile in benchmarks)
+    counts, start = {}, time.time()
+
+    with open(output_file, "w", newline='') as f, \
+            ProverPool(workers, time_limit, memory_limit and memory_limit * 2 ** 20, backend) as pool:
+        writer = csv.DictWriter(f, FIELDS) if out_format == 'csv' else None
+        if writer: writer.writeheader()
+
+        for result in pool.prove(tasks):
+            # folders are separated into provable and non-provable fml
+            req_outcome = os.path.basename(os.path.dirname(result['name']))[-1:]
+            result['expected'] = {'p': "valid", 'n': "not valid"}.get(req_outcome)
+            result['correct'] = result['result'] == result['expected'] if result['expected'] else None
+            counts[result['result']] = counts.get(result['result'], 0) + 1
+
+            if writer: writer.writerow(result)
+            else: f.write(json.dumps(result) + "\n")
+            f.flush()
+            print(result['name'] + ": " + result['result'] + " in " + str(result['time']))
+
+    print(str(len(benchmarks)) + " benchmarks in " + str(round(time.time() - start, 1)) + " s: " +
+          ", ".join(k + " " + str(v) for k, v in sorted(counts.items())))
+    return output_file
+
+
+def get_parent_dir(filepath, ancestor):
+    if ancestor == 0:
+        return filepath
+    else:
+        return get_parent_dir(os.path.abspath(os.path.join(filepath, os.pardir)), ancestor - 1)
+
+
+def file_import(filename):
+    assert os.path.exists(filename) == True, "The specified benchmark cannot be located."
+
+    with open(filename, "r") as fileobj:
+        return fileobj.read().rstrip("\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the benchmarks on a pool of prover processes.")
+    parser.add_argument('l_type', nargs='?', default="all_subclasses", help="benchmark folder, '.' for all")
+    parser.add_argument('-j', '--workers', type=int, help="worker processes, defaults to one per core")
+    parser.add_argument('-t', '--time', type=float, default=TIME_LIM, help="time limit per benchmark in seconds")
+    parser.add_argument('-m', '--memory', type=int, help="memory limit per worker in megabytes")
+    parser.add_argument('-b', '--backend', default='z3')
+    parser.add_argument('-f', '--format', choices=['jsonl', 'csv'], default='jsonl')
+    args = parser.parse_args()
+
+    print(parallel_test(args.l_type, args.workers, args.time, args.memory, args.backend, args.format))
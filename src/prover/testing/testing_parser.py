@@ -0,0 +1,117 @@
+import os, sys, glob, time, random, argparse
+
+bench_sub = '/benchmarks/'
+pattern = '*.k'
+
+FOLDERS = ['k_n', 'k_p', 'to_time']
+REPEATS = 3
+SYMBOLS = ['a', 'b', 'p1', 'True', 'False', '~', '&', '|', '=>', '<=>', '[]', '[r1]', '<>', '<r1>', '(', ')', ' ']
+
+
+def throughput_test(folders=FOLDERS, repeats=REPEATS):
+    """ Parse every benchmark in the folders with parser and with the ply reference parser, and report the
+    throughput of each in KB of formula per second, the best of repeats runs. The parsers must form the same node.
+
+    :return number of benchmarks the parsers disagree on
+    """
+    sys.path.insert(0, get_parent_dir(os.path.abspath(__file__), 3))
+    import clausal
+    import parser, ply_parser
+
+    bench_root = get_parent_dir(os.path.abspath(__file__), 4) + bench_sub
+    parsers = [('pratt', parser.parse), ('ply', ply_parser.parse)]
+    totals, mismatches = {name: 0.0 for name, _ in parsers}, 0
+    size = 0
+
+    for folder in folders:
+        assert os.path.exists(bench_root + folder) == True, "The specified benchmark folder cannot be located."
+        times, folder_size = {name: 0.0 for name, _ in parsers}, 0
+
+        for bfile in sorted(glob.glob(os.path.join(bench_root + folder, '**', pattern), recursive=True)):
+            fml = file_import(bfile)
+            folder_size += len(fml)
+            nodes = []
+            for name, parse in parsers:
+                best = None
+                for _ in range(repeats):
+                    start = time.perf_counter()
+                    node = parse(fml)
+                    elapsed = time.perf_counter() - start
+                    best = elapsed if best is None else min(best, elapsed)
+                times[name] += best
+                nodes.append(node)
+
+            if nodes[0] is not nodes[1]:
+                mismatches += 1
+                print("MISMATCH " + os.path.relpath(bfile, bench_root))
+
+        print(folder + ": " + str(folder_size // 1024) + " KB, " + format_rates(times, folder_size))
+        size += folder_size
+        for name in totals: totals[name] += times[name]
+
+    print("total: " + str(size // 1024) + " KB, " + format_rates(totals, size) + ", " + str(mismatches) +
+          " mismatched")
+    return mismatches
+
+
+def random_test(cases, seed=0):
+    """ Parse random strings of formula symbols with both parsers. Both must reject the same strings, at the same
+    position, and form the same node for the others.
+
+    :return number of strings the parsers disagree on
+    """
+    sys.path.insert(0, get_parent_dir(os.path.abspath(__file__), 3))
+    import clausal
+    import parser, ply_parser
+
+    rand = random.Random(seed)
+    mismatches, accepted = 0, 0
+    for case in range(cases):
+        data = "".join(rand.choice(SYMBOLS) for _ in range(rand.randint(0, 12)))
+        outcomes = []
+        for parse in (parser.parse, ply_parser.parse):
+            try:
+                outcomes.append(parse(data))
+            except parser.ParseError as e:
+                outcomes.append(e.position)
+
+        if outcomes[0] is not outcomes[1] and outcomes[0] != outcomes[1]:
+            mismatches += 1
+            print("MISMATCH " + repr(data) + ": " + ", ".join(str(o) for o in outcomes))
+        elif not isinstance(outcomes[0], int):
+            accepted += 1
+
+    print(str(cases) + " random strings, " + str(accepted) + " formulas, " + str(mismatches) + " mismatched")
+    return mismatches
+
+
+def format_rates(times, size):
+    return ", ".join(name + " %.0f KB/s" % (size / 1024 / times[name]) for name in times)
+
+
+def get_parent_dir(filepath, ancestor):
+    if ancestor == 0:
+        return filepath
+    else:
+        return get_parent_dir(os.path.abspath(os.path.join(filepath, os.pardir)), ancestor - 1)
+
+
+def file_import(filename):
+    assert os.path.exists(filename) == True, "The specified benchmark cannot be located."
+
+    with open(filename, "r") as fileobj:
+        return fileobj.read().rstrip("\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the parser against the ply reference parser.")
+    parser.add_argument('folders', nargs='*', default=FOLDERS)
+    parser.add_argument('-r', '--repeats', type=int, default=REPEATS, help="runs per benchmark, the best is kept")
+    parser.add_argument('-s', '--strings', type=int, metavar='CASES',
+                        help="check the parsers on CASES random strings, instead of the benchmarks")
+    args = parser.parse_args()
+
+    if args.strings:
+        sys.exit(1 if random_test(args.strings) else 0)
+    else:
+        sys.exit(1 if throughput_test(args.folders, args.repeats) else 0)
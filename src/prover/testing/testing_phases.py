@@ -0,0 +1,186 @@
+import os, sys, glob, json, time, argparse, multiprocessing
+
+bench_sub = '/benchmarks/'
+results_sub = "/results/"
+pattern = '*.k'
+
+TIME_LIM = 60
+FOLDERS = ['k_n', 'k_p', 'to_time']
+PHASES = ['parse', 'nnf', 'simplify', 'clausify', 'prove']
+BASELINE = "baseline_phases.json"
+TOLERANCE = 0.25    # relative slowdown of a phase that is flagged
+MIN_DELTA = 0.05    # seconds, slowdowns below this are noise
+
+
+def phase_test(folders=FOLDERS, instances=None, time_limit=TIME_LIM, backend='z3'):
+    """ Time each phase of the pipeline for every benchmark in the folders, each in a fresh process.
+
+    :param folders: benchmark folders
+    :param instances: only the first N instances of each family, or None for all
+    :param time_limit: wall clock seconds allowed per benchmark
+    :param backend: name of the SAT solver backend
+
+    :return dictionary of benchmark name to record, see measure
+    """
+    ancestor_path = get_parent_dir(os.path.abspath(__file__), 4)
+    bench_root = ancestor_path + bench_sub
+
+    # a fixed hash seed, as set iteration order steers the proof search
+    os.environ['PYTHONHASHSEED'] = '0'
+    context = multiprocessing.get_context('spawn')
+    sys.path.insert(0, get_parent_dir(os.path.abspath(__file__), 3))
+
+    records = {}
+    for folder in folders:
+        assert os.path.exists(bench_root + folder) == True, "The specified benchmark folder cannot be located."
+        for family in sorted(glob.glob(os.path.join(bench_root + folder, '**', ''), recursive=True)):
+            benchmarks = sorted(glob.glob(family + pattern), key=instance_number)
+            for bfile in benchmarks[:instances]:
+                name = os.path.relpath(bfile, bench_root)
+                records[name] = run_measure(context, file_import(bfile), backend, time_limit)
+                print(name + ": " + format_record(records[name]))
+
+    return records
+
+
+def run_measure(context, fml, backend, time_limit):
+    """
+    :return record of the phases completed within the time limit, with the result timeout if not all of them.
+    """
+    parent_conn, child_conn = context.Pipe()
+    process = context.Process(target=measure, args=(child_conn, fml, backend), daemon=True)
+    process.start()
+    child_conn.close()
+
+    record, deadline = {'result': "timeout"}, time.time() + time_limit
+    try:
+        while parent_conn.poll(max(deadline - time.time(), 0)):
+            record.update(parent_conn.recv())
+    except EOFError:
+        if record['result'] == "timeout": record['result'] = "error"
+    finally:
+        process.kill()
+        process.join()
+    return record
+
+
+def measure(conn, fml, backend):
+    """ Sends the time of each phase as it completes, then the result with the solver calls and peak memory.
+    """
+    import resource
+    sys.setrecursionlimit(15000)
+    import main
+    import parser, nnf, simplify, clausify
+    from prover import backend as backends
+    from prover.k_prove import k_prove
+    from prover.backend import sat
+
+    calls = [0]
+    backends.BACKENDS[backend] = counting_backend(backends.BACKENDS[backend], calls)
+
+    data = "~(" + fml + ")"
+    for phase, function in zip(PHASES, [parser.parse, nnf.to_nnf, simplify.simplify, clausify.clausify,
+                                        lambda mcf: k_prove(mcf, backend)]):
+        start = time.time()
+        data = function(data)
+        conn.send({phase: time.time() - start})
+
+    conn.send({'result': "not valid" if data == sat else "valid", 'solver_calls': calls[0],
+               'peak_rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024})
+
+
+def counting_backend(backend_class, calls):
+    """
+    :return subclass of the backend, and of its optimiser, counting each check in calls[0]
+    """
+    def counting(base):
+        def check(self, *args, **kwargs):
+            calls[0] += 1
+            return base.check(self, *args, **kwargs)
+        return type('Counting' + base.__name__, (base,), {'check': check})
+
+    counted = counting(backend_class)
+    counted.optimiser = counted if backend_class.optimiser is backend_class else counting(backend_class.optimiser)
+    return counted
+
+
+def compare(records, baseline, tolerance=TOLERANCE):
+    """
+    :return list of regressions: changed results, new timeouts, slower phases and more solver calls.
+    """
+    regressions = []
+
+    for name, record in sorted(records.items()):
+        base = baseline.get(name)
+        if base is None: continue
+
+        if record['result'] != base['result']:
+            regressions.append(name + ": result " + base['result'] + " -> " + record['result'])
+            continue
+        for phase in PHASES + ['solver_calls']:
+            if phase not in record or phase not in base: continue
+            new, old = record[phase], base[phase]
+            limit = old * (1 + tolerance)
+            if new > limit and (phase == 'solver_calls' or new - old > MIN_DELTA):
+                regressions.append(name + ": " + phase + " " + format_value(old) + " -> " + format_value(new))
+
+    return regressions
+
+
+def format_record(record):
+    fields = [record['result']] + [phase + " " + format_value(record[phase]) for phase in PHASES if phase in record]
+    if 'solver_calls' in record: fields.append("solver calls " + str(record['solver_calls']))
+    if 'peak_rss' in record: fields.append("peak " + str(record['peak_rss'] // 2 ** 20) + " MB")
+    return ", ".join(fields)
+
+
+def format_value(value):
+    return str(value) if isinstance(value, int) else "%.3f" % value
+
+
+def instance_number(bfile):
+    digits = os.path.basename(bfile).split('.')[0]
+    return int(digits) if digits.isdigit() else 0
+
+
+def get_parent_dir(filepath, ancestor):
+    if ancestor == 0:
+        return filepath
+    else:
+        return get_parent_dir(os.path.abspath(os.path.join(filepath, os.pardir)), ancestor - 1)
+
+
+def file_import(filename):
+    assert os.path.exists(filename) == True, "The specified benchmark cannot be located."
+
+    with open(filename, "r") as fileobj:
+        return fileobj.read().rstrip("\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time each phase of the prover on the benchmarks.")
+    parser.add_argument('folders', nargs='*', default=FOLDERS)
+    parser.add_argument('-n', '--instances', type=int, help="first N instances of each family")
+    parser.add_argument('-t', '--time', type=float, default=TIME_LIM, help="time limit per benchmark in seconds")
+    parser.add_argument('-b', '--backend', default='z3')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE, help="relative slowdown flagged")
+    parser.add_argument('--baseline', help="baseline file, defaults to " + BASELINE + " in the results folder")
+    parser.add_argument('--save-baseline', action='store_true', help="store this run as the baseline")
+    args = parser.parse_args()
+
+    results_dir = get_parent_dir(os.path.abspath(__file__), 1) + os.path.join(str(results_sub))
+    baseline_file = args.baseline or results_dir + BASELINE
+
+    records = phase_test(args.folders, args.instances, args.time, args.backend)
+    with open(results_dir + "phases_" + time.strftime("%m%d-%H%M%S") + ".json", "w") as f:
+        json.dump(records, f, indent=1, sort_keys=True)
+
+    if args.save_baseline:
+        with open(baseline_file, "w") as f:
+            json.dump(records, f, indent=1, sort_keys=True)
+        print("Baseline saved to " + baseline_file)
+    elif os.path.exists(baseline_file):
+        with open(baseline_file) as f:
+            regressions = compare(records, json.load(f), args.tolerance)
+        print("\n".join(["REGRESSION " + r for r in regressions] or ["No regressions against " + baseline_file]))
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,80 @@
+import os, sys, time, argparse
+from subprocess import Popen, PIPE
+
+REPEATS = 10
+TOP = 5     # imports listed per formula, by cumulative time
+FORMULAS = [
+    ("trivial", "(a & True) | ~a | ~True | True"),
+    ("propositional", "(a | b) & (~a | c) => (b | c)"),
+    ("modal", "[r1](a => b) => ([r1]a => [r1]b)"),
+]
+
+
+def startup_test(formulas=FORMULAS, repeats=REPEATS, backend='z3'):
+    """ Time the prover CLI on small formulas, where process startup dominates, and report the imports behind it.
+
+    :param formulas: list of tuples (name, formula)
+    :param repeats: runs per formula, the median time is reported
+    :param backend: name of the SAT solver backend
+
+    :return dictionary of formula name to record of median wall clock time, import time and imported modules
+    """
+    main_file = get_parent_dir(os.path.abspath(__file__), 3) + "/main.py"
+    records = {}
+
+    for name, fml in formulas:
+        times, imports = [], None
+        for _ in range(repeats):
+            start = time.time()
+            popen = Popen([sys.executable, "-X", "importtime", main_file, "-b", backend], stdin=PIPE, stdout=PIPE,
+                          stderr=PIPE)
+            stdout, stderr = popen.communicate(str.encode(fml + "\n"))
+            times.append(time.time() - start)
+            imports = parse_importtime(stderr.decode("utf-8"))
+
+        times.sort()
+        records[name] = {'time': times[len(times) // 2], 'result': stdout.decode("utf-8").strip(),
+                         'imports': imports, 'import_time': sum(t for _, t, level in imports if level == 0)}
+
+        record = records[name]
+        print(name + ": " + record['result'] + ", %.3f s, imports %.3f s, z3 %s" %
+              (record['time'], record['import_time'], "loaded" if loaded(imports, 'z3') else "not loaded"))
+        for module, cumulative, _ in sorted(imports, key=lambda i: -i[1])[:TOP]:
+            print("    %-30s %.3f s" % (module, cumulative))
+
+    return records
+
+
+def parse_importtime(output):
+    """
+    :param output: standard error of a python process run with -X importtime
+
+    :return list of tuples (module, cumulative seconds, nesting level)
+    """
+    imports = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line: continue
+        _, cumulative, module = line[len("import time:"):].split("|")
+        level = (len(module) - len(module.lstrip()) - 1) // 2
+        imports.append((module.strip(), int(cumulative) / 1e6, level))
+    return imports
+
+
+def loaded(imports, package):
+    return any(module == package or module.startswith(package + ".") for module, _, _ in imports)
+
+
+def get_parent_dir(filepath, ancestor):
+    if ancestor == 0:
+        return filepath
+    else:
+        return get_parent_dir(os.path.abspath(os.path.join(filepath, os.pardir)), ancestor - 1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the startup of the prover on small formulas.")
+    parser.add_argument('-r', '--repeats', type=int, default=REPEATS, help="runs per formula, the median is kept")
+    parser.add_argument('-b', '--backend', default='z3')
+    args = parser.parse_args()
+
+    startup_test(FORMULAS, args.repeats, args.backend)